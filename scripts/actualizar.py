@@ -0,0 +1,270 @@
+#!/usr/bin/env -S uv run
+# /// script
+# dependencies = [
+#   "httpx",
+#   "requests",
+#   "pdfplumber",
+#   "beautifulsoup4",
+#   "urllib3",
+#   "pandas",
+# ]
+# ///
+"""
+Script para actualizar todo el dataset del monotributo en una sola corrida
+Descarga en paralelo la página actual de AFIP, los PDFs históricos faltantes y la serie de IPC,
+parsea en un pool de procesos y escribe el dataset consolidado una única vez
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import httpx
+
+import scrape_actual
+import scrape_historico
+import validar_datos
+import datos
+import historial
+import archivo_fuentes
+import escritura
+
+IPC_URL = datos.IPC_URL
+IPC_JSON = datos.IPC_JSON
+MAX_CONEXIONES = 8
+
+
+class ActualizacionIncompleta(Exception):
+    """Fallaron períodos históricos pendientes: el dataset no se escribe"""
+
+    def __init__(self, fallidos: List[Dict[str, str]]):
+        self.fallidos = fallidos
+        super().__init__(f"Fallaron {len(fallidos)} período(s) histórico(s): "
+                         f"{', '.join(f['period'] for f in fallidos)}")
+
+
+async def fetch(client: httpx.AsyncClient, url: str) -> bytes:
+    """Descarga una URL usando el pool de conexiones compartido"""
+    response = await client.get(url)
+    response.raise_for_status()
+    return response.content
+
+
+async def fetch_historical_period(client: httpx.AsyncClient, executor: Executor,
+                                  pdf_info: Dict[str, str], base_url: str, archivo: archivo_fuentes.Archivo,
+                                  max_memoria_mb: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Descarga el PDF de un período (si falta), lo archiva y lo parsea en el executor"""
+    period = pdf_info["period"]
+    pdf_url = base_url + pdf_info["url"]
+    pdf_path = scrape_historico.OUTPUT_DIR / pdf_info["url"].split("/")[-1]
+
+    descargado = not pdf_path.exists()
+    if descargado:
+        print(f"Descargando: {pdf_url}")
+        content = await fetch(client, pdf_url)
+        # Atómico: un PDF cortado a medias se tomaría como ya descargado en la próxima corrida
+        escritura.write_bytes_atomic(pdf_path, content)
+        print(f"  ✓ Guardado en: {pdf_path}")
+    else:
+        content = pdf_path.read_bytes()
+    archivo.guardar(archivo_fuentes.TIPO_PDF, pdf_url, content, descargado=descargado, periodo=period)
+
+    loop = asyncio.get_running_loop()
+    extract = functools.partial(scrape_historico.extract_pdf_records, max_memory_mb=max_memoria_mb)
+    records = await loop.run_in_executor(executor, extract, pdf_path, period)
+    print(f"  ✓ {period}: {len(records)} registro(s)")
+    return records
+
+
+async def fetch_current_period(client: httpx.AsyncClient, executor: Executor,
+                               url_actual: str, archivo: archivo_fuentes.Archivo) -> List[Dict[str, Any]]:
+    """Descarga la página actual, la archiva y la parsea en el executor"""
+    content = await fetch(client, url_actual)
+    archivo.guardar(archivo_fuentes.TIPO_ACTUAL, url_actual, content)
+    loop = asyncio.get_running_loop()
+    records, start_date, end_date = await loop.run_in_executor(executor, scrape_actual.parse_current_html, content)
+    print(f"  ✓ Período actual {start_date} → {end_date}: {len(records)} registro(s)")
+    return records
+
+
+def parse_ipc(content: bytes) -> List[Dict[str, Any]]:
+    """Decodifica la serie de IPC y verifica que tenga la forma que espera datos.cargar_ipc"""
+    serie = json.loads(content)
+    if not isinstance(serie, list) or not serie:
+        raise ValueError("la serie de IPC no es una lista de meses")
+    for mes in serie:
+        if not isinstance(mes, dict) or 'fecha' not in mes or not isinstance(mes.get('valor'), (int, float)):
+            raise ValueError(f"mes de IPC inválido: {mes}")
+    return serie
+
+
+def load_dataset(path: str) -> Optional[Dict[str, Any]]:
+    """Lee el dataset existente (None si todavía no existe)"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+async def update(
+    base_url: str = scrape_historico.BASE_URL,
+    url_actual: str = scrape_actual.URL_ACTUAL,
+    ipc_url: str = IPC_URL,
+    output_json: str = scrape_actual.HISTORICO_JSON,
+    ipc_json: str = IPC_JSON,
+    historial_dir: Path = historial.HISTORIAL_DIR,
+    archivo_dir: Path = archivo_fuentes.ARCHIVO_DIR,
+    reparsear: bool = False,
+    max_conexiones: int = MAX_CONEXIONES,
+    max_memoria_mb: Optional[float] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    executor: Optional[Executor] = None,
+) -> Dict[str, Any]:
+    """
+    Actualiza el dataset completo de forma concurrente
+
+    `transport` permite reemplazar la capa de red (ej: httpx.MockTransport o un servidor local)
+    y `executor` el pool donde se parsean los PDFs y el HTML. `max_memoria_mb` limita la
+    memoria de cada proceso que extrae PDFs. Todo lo descargado se guarda en el archivo de
+    fuentes de `archivo_dir`.
+    """
+    archivo = archivo_fuentes.Archivo(archivo_dir)
+    dataset = load_dataset(output_json)
+    existing_periods = set()
+    if dataset is not None:
+        existing_periods = {(r['start_date'], r['end_date']) for r in dataset['data']}
+
+    # Solo se parsean los períodos históricos que no están en el dataset
+    pending = [
+        pdf_info for pdf_info in scrape_historico.PDF_DATA
+        if reparsear or dataset is None
+        or scrape_historico.parse_period(pdf_info["period"]) not in existing_periods
+    ]
+    print(f"Períodos históricos a procesar: {len(pending)}")
+
+    scrape_historico.OUTPUT_DIR.mkdir(exist_ok=True)
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor()
+
+    try:
+        limits = httpx.Limits(max_connections=max_conexiones, max_keepalive_connections=max_conexiones)
+        async with httpx.AsyncClient(transport=transport, limits=limits, timeout=30, verify=False) as client:
+            results = await asyncio.gather(
+                fetch_current_period(client, executor, url_actual, archivo),
+                fetch(client, ipc_url),
+                *[fetch_historical_period(client, executor, pdf_info, base_url, archivo, max_memoria_mb)
+                  for pdf_info in pending],
+                return_exceptions=True,
+            )
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    current_records, ipc_content, *historical_results = results
+
+    if isinstance(current_records, Exception):
+        raise current_records
+    if not current_records:
+        raise Exception("No se encontraron datos en la página actual")
+
+    historical_records = []
+    fallidos = []
+    for pdf_info, result in zip(pending, historical_results):
+        if isinstance(result, Exception):
+            print(f"  ✗ Error procesando {pdf_info['period']}: {result}")
+            fallidos.append({"period": pdf_info['period'], "url": base_url + pdf_info['url'], "error": str(result)})
+            continue
+        historical_records.append(result)
+
+    # Sin todos los períodos pendientes el dataset quedaría incompleto: no se escribe nada
+    if fallidos:
+        raise ActualizacionIncompleta(fallidos)
+
+    # El IPC se decodifica antes de escribir: una respuesta inválida cuenta como una descarga fallida
+    ipc_data = None
+    if not isinstance(ipc_content, Exception):
+        try:
+            ipc_data = parse_ipc(ipc_content)
+        except ValueError as e:
+            ipc_content = e
+
+    # Consolidar todo en memoria y escribir una sola vez
+    if dataset is None:
+        dataset = scrape_historico.build_output([r for records in historical_records for r in records])
+    else:
+        for records in historical_records:
+            if records:
+                scrape_actual.merge_records(dataset, records)
+    scrape_actual.merge_records(dataset, current_records)
+
+    # Solo bloquean la escritura los errores de los períodos que se acaban de procesar
+    written = {(r['start_date'], r['end_date']) for records in historical_records + [current_records] for r in records}
+    validar_datos.verificar(dataset['data'], periodos=written)
+
+    # Registrar el cambio en el historial; si no hay cambios no se reescribe el dataset
+    sources = [url_actual] + [base_url + pdf_info['url'] for pdf_info in pending]
+    version = historial.guardar_dataset(output_json, dataset, fuente=", ".join(sources), directorio=historial_dir)
+    if version is None:
+        print(f"\n✓ Sin cambios en el dataset ({output_json})")
+    else:
+        print(f"\n✓ Dataset guardado en: {output_json} (versión {version} del historial)")
+        print(f"  Total de registros: {dataset['metadata']['total_records']}")
+
+    if isinstance(ipc_content, Exception):
+        print(f"  ✗ Error descargando IPC (se conserva {ipc_json}): {ipc_content}")
+    else:
+        archivo.guardar(archivo_fuentes.TIPO_IPC, ipc_url, ipc_content)
+        escritura.write_json_atomic(ipc_json, ipc_data)
+        print(f"✓ Serie de IPC guardada en: {ipc_json}")
+
+    return dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Actualiza el dataset del monotributo (página actual, PDFs históricos e IPC) en paralelo'
+    )
+    parser.add_argument('--base-url', default=scrape_historico.BASE_URL, help='URL base de los PDFs históricos')
+    parser.add_argument('--url-actual', default=scrape_actual.URL_ACTUAL, help='URL de la página de categorías vigentes')
+    parser.add_argument('--ipc-url', default=IPC_URL, help='URL de la serie de inflación mensual')
+    parser.add_argument('--reparsear', action='store_true', help='Volver a parsear todos los PDFs históricos')
+    parser.add_argument('--max-conexiones', type=int, default=MAX_CONEXIONES, help='Máximo de conexiones HTTP simultáneas')
+    parser.add_argument('--max-memoria-mb', type=float, default=None, help='Máximo de memoria (MB) por proceso de extracción de PDFs')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("ACTUALIZACIÓN DEL MONOTRIBUTO")
+    print("=" * 80)
+    print()
+
+    try:
+        asyncio.run(update(
+            base_url=args.base_url,
+            url_actual=args.url_actual,
+            ipc_url=args.ipc_url,
+            reparsear=args.reparsear,
+            max_conexiones=args.max_conexiones,
+            max_memoria_mb=args.max_memoria_mb,
+        ))
+    except ActualizacionIncompleta as e:
+        print(f"\n{'='*80}")
+        print(f"✗ FALLARON {len(e.fallidos)} PERÍODO(S): NO SE ESCRIBE EL DATASET")
+        print(f"{'='*80}")
+        for fallido in e.fallidos:
+            print(f"  {fallido['period']} ({fallido['url']}): {fallido['error']}")
+        sys.exit(1)
+
+    print("\n" + "=" * 80)
+    print("PROCESO COMPLETADO")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
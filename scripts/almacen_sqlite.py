@@ -0,0 +1,285 @@
+#!/usr/bin/env -S uv run
+# /// script
+# dependencies = []
+# ///
+"""
+Almacenamiento del dataset del monotributo en SQLite
+Alternativa al archivo JSON: esquema normalizado (períodos, categorías y montos por tipo de
+actividad) en modo WAL, con escrituras por período y exportación al JSON de siempre
+"""
+
+import sys
+import json
+import sqlite3
+import argparse
+from typing import List, Dict, Any, Optional
+
+import historial
+
+DB_PATH = "data/monotributo.sqlite"
+DATA_JSON = "data/monotributo_historico.json"
+
+# Orden de los campos de cada registro en el JSON
+CAMPOS_REGISTRO = [
+    "start_date",
+    "end_date",
+    "categoria",
+    "tipo_actividad",
+    "ingresos_brutos",
+    "superficie_afectada",
+    "energia_electrica",
+    "alquileres_devengados",
+    "precio_unitario_maximo",
+    "impuesto_integrado",
+    "aporte_sipa",
+    "aporte_obra_social",
+    "total",
+]
+
+# Campos compartidos por los registros de servicios y ventas de una categoría
+CAMPOS_CATEGORIA = [
+    "ingresos_brutos",
+    "superficie_afectada",
+    "energia_electrica",
+    "alquileres_devengados",
+    "precio_unitario_maximo",
+]
+
+# Campos propios de cada tipo de actividad
+CAMPOS_MONTO = ["impuesto_integrado", "aporte_sipa", "aporte_obra_social", "total"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    clave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS periodos (
+    id INTEGER PRIMARY KEY,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS categorias (
+    periodo_id INTEGER NOT NULL REFERENCES periodos(id) ON DELETE CASCADE,
+    categoria TEXT NOT NULL,
+    ingresos_brutos INTEGER,
+    superficie_afectada TEXT,
+    energia_electrica TEXT,
+    alquileres_devengados INTEGER,
+    precio_unitario_maximo INTEGER,
+    PRIMARY KEY (periodo_id, categoria)
+);
+
+CREATE TABLE IF NOT EXISTS montos (
+    periodo_id INTEGER NOT NULL,
+    categoria TEXT NOT NULL,
+    tipo_actividad TEXT NOT NULL,
+    posicion INTEGER NOT NULL,
+    impuesto_integrado INTEGER,
+    aporte_sipa INTEGER,
+    aporte_obra_social INTEGER,
+    total INTEGER,
+    PRIMARY KEY (periodo_id, categoria, tipo_actividad),
+    FOREIGN KEY (periodo_id, categoria) REFERENCES categorias(periodo_id, categoria) ON DELETE CASCADE
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_periodos_fechas ON periodos(start_date, end_date);
+CREATE INDEX IF NOT EXISTS idx_montos_categoria_tipo ON montos(categoria, tipo_actividad);
+CREATE INDEX IF NOT EXISTS idx_categorias_ingresos ON categorias(ingresos_brutos);
+
+CREATE VIEW IF NOT EXISTS registros AS
+SELECT p.start_date, p.end_date, m.categoria, m.tipo_actividad,
+       c.ingresos_brutos, c.superficie_afectada, c.energia_electrica,
+       c.alquileres_devengados, c.precio_unitario_maximo,
+       m.impuesto_integrado, m.aporte_sipa, m.aporte_obra_social, m.total,
+       p.id AS periodo_id, m.posicion
+FROM montos m
+JOIN periodos p ON p.id = m.periodo_id
+JOIN categorias c ON c.periodo_id = m.periodo_id AND c.categoria = m.categoria;
+"""
+
+
+def connect(path: str = DB_PATH, readonly: bool = False) -> sqlite3.Connection:
+    """
+    Abre la base en modo WAL (los lectores no se bloquean mientras un scraper escribe)
+
+    Con `readonly=True` se abre en solo lectura, sin crear el esquema: es la forma de
+    consultar desde muchos procesos en paralelo.
+    """
+    if readonly:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+    else:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _write_metadata(conn: sqlite3.Connection, metadata: Dict[str, Any]):
+    """Reemplaza la metadata (dentro de la transacción abierta), cada clave como JSON y en orden"""
+    conn.execute("DELETE FROM metadata")
+    conn.executemany(
+        "INSERT INTO metadata (clave, valor) VALUES (?, ?)",
+        [(clave, json.dumps(valor, ensure_ascii=False)) for clave, valor in metadata.items()],
+    )
+
+
+def save_metadata(conn: sqlite3.Connection, metadata: Dict[str, Any]):
+    """Guarda la metadata del dataset (el total y el rango de fechas se toman de la base)"""
+    with conn:
+        _write_metadata(conn, metadata)
+        _refresh_metadata(conn)
+
+
+def load_metadata(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Lee la metadata del dataset"""
+    rows = conn.execute("SELECT clave, valor FROM metadata ORDER BY rowid").fetchall()
+    return {row["clave"]: json.loads(row["valor"]) for row in rows}
+
+
+def _insert_period(conn: sqlite3.Connection, records: List[Dict[str, Any]]):
+    """Reemplaza los registros de un período (dentro de la transacción abierta)"""
+    start_date, end_date = records[0]["start_date"], records[0]["end_date"]
+    conn.execute("DELETE FROM periodos WHERE start_date = ? AND end_date = ?", (start_date, end_date))
+    periodo_id = conn.execute(
+        "INSERT INTO periodos (start_date, end_date) VALUES (?, ?)", (start_date, end_date)
+    ).lastrowid
+
+    categorias: Dict[str, tuple] = {}
+    for record in records:
+        values = tuple(record[field] for field in CAMPOS_CATEGORIA)
+        if categorias.setdefault(record["categoria"], values) != values:
+            raise ValueError(
+                f"Los registros de la categoría {record['categoria']} ({start_date} → {end_date}) "
+                "tienen distintos topes según el tipo de actividad"
+            )
+
+    conn.executemany(
+        f"INSERT INTO categorias (periodo_id, categoria, {', '.join(CAMPOS_CATEGORIA)}) "
+        f"VALUES (?, ?, {', '.join('?' * len(CAMPOS_CATEGORIA))})",
+        [(periodo_id, categoria, *values) for categoria, values in categorias.items()],
+    )
+    conn.executemany(
+        f"INSERT INTO montos (periodo_id, categoria, tipo_actividad, posicion, {', '.join(CAMPOS_MONTO)}) "
+        f"VALUES (?, ?, ?, ?, {', '.join('?' * len(CAMPOS_MONTO))})",
+        [
+            (periodo_id, record["categoria"], record["tipo_actividad"], posicion,
+             *(record[field] for field in CAMPOS_MONTO))
+            for posicion, record in enumerate(records)
+        ],
+    )
+
+
+def _refresh_metadata(conn: sqlite3.Connection):
+    """Actualiza el total de registros y la fecha final (igual que merge_records con el JSON)"""
+    total, to = conn.execute("SELECT COUNT(*), MAX(end_date) FROM registros").fetchone()
+    metadata = load_metadata(conn)
+    if not metadata:
+        return
+    metadata["total_records"] = total
+    metadata["date_range"]["to"] = to
+    conn.executemany(
+        "UPDATE metadata SET valor = ? WHERE clave = ?",
+        [(json.dumps(metadata[clave], ensure_ascii=False), clave) for clave in ("total_records", "date_range")],
+    )
+
+
+def upsert_period(conn: sqlite3.Connection, records: List[Dict[str, Any]]):
+    """Inserta o reemplaza los registros de un período en una sola transacción"""
+    if not records:
+        return
+    with conn:
+        _insert_period(conn, records)
+        _refresh_metadata(conn)
+
+
+def import_json(conn: sqlite3.Connection, data: Dict[str, Any]):
+    """Reemplaza el contenido de la base con un dataset en formato JSON"""
+    periods: Dict[tuple, List[Dict[str, Any]]] = {}
+    for record in data["data"]:
+        periods.setdefault((record["start_date"], record["end_date"]), []).append(record)
+
+    with conn:
+        conn.execute("DELETE FROM periodos")
+        _write_metadata(conn, data["metadata"])
+        for records in periods.values():
+            _insert_period(conn, records)
+
+    # Estadísticas para que el planificador elija los índices
+    conn.execute("PRAGMA optimize")
+
+
+def load_records(conn: sqlite3.Connection, fecha: Optional[str] = None, categoria: Optional[str] = None,
+                 tipo_actividad: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Lee registros en el orden del JSON, filtrando opcionalmente por fecha de vigencia
+    (YYYY-MM-DD), categoría y tipo de actividad
+    """
+    conditions = []
+    params: List[Any] = []
+    if fecha is not None:
+        conditions.append("start_date <= ? AND end_date >= ?")
+        params.extend([fecha, fecha])
+    if categoria is not None:
+        conditions.append("categoria = ?")
+        params.append(categoria)
+    if tipo_actividad is not None:
+        conditions.append("tipo_actividad = ?")
+        params.append(tipo_actividad)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = conn.execute(
+        f"SELECT {', '.join(CAMPOS_REGISTRO)} FROM registros {where} "
+        "ORDER BY start_date, periodo_id, posicion",
+        params,
+    )
+    return [dict(row) for row in rows]
+
+
+def export_json(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """Arma el dataset con el mismo formato (y orden) que data/monotributo_historico.json"""
+    metadata = load_metadata(conn)
+    if not metadata:
+        raise ValueError("La base no tiene datos; importar primero el JSON con 'importar'")
+    return {"metadata": metadata, "data": load_records(conn)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa o exporta el dataset del monotributo en SQLite')
+    parser.add_argument('accion', choices=['importar', 'exportar'], help='importar el JSON a la base o exportar la base a JSON')
+    parser.add_argument('--db', default=DB_PATH, help='Archivo de la base SQLite')
+    parser.add_argument('--json', default=DATA_JSON, help='Archivo JSON del dataset')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("ALMACÉN SQLITE DEL MONOTRIBUTO")
+    print("=" * 80)
+
+    if args.accion == 'importar':
+        with open(args.json, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        conn = connect(args.db)
+        import_json(conn, data)
+        print(f"✓ {len(data['data'])} registros importados de {args.json} a {args.db}")
+    else:
+        conn = connect(args.db, readonly=True)
+        try:
+            data = export_json(conn)
+        except ValueError as e:
+            print(f"✗ {e}")
+            sys.exit(1)
+        # Por defecto se reemplaza el dataset canónico del repositorio: pasa por el historial
+        version = historial.guardar_dataset(args.json, data, fuente=f"sqlite:{args.db}")
+        if version is None:
+            print(f"✓ Sin cambios: {args.json} ya coincide con {args.db}")
+        else:
+            print(f"✓ {len(data['data'])} registros exportados de {args.db} a {args.json} (versión {version} del historial)")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@
 #   "pandas",
 #   "plotly",
 #   "jinja2",
+#   "kaleido",
 # ]
 # ///
 """
@@ -11,13 +12,18 @@ Script para analizar la evolución histórica del monotributo por categoría
 Genera gráficos interactivos usando pandas y plotly
 """
 
-import json
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
 import argparse
 
+from datos import cargar_dataframe
+from deflactores import DEFLACTOR_IPC, cargar_deflactores
+import graficos
+import indice
+import miniaturas
+
 # Configurar argumentos de línea de comandos
 parser = argparse.ArgumentParser(
     description='Analiza la evolución del monotributo por categoría con ajuste por inflación'
@@ -30,10 +36,17 @@ parser.add_argument(
     help='Tipo de actividad a analizar (servicios o ventas)'
 )
 parser.add_argument(
-    '--ipc-base',
+    '--ipc-base', '--base',
+    dest='ipc_base',
     type=str,
     default=None,
-    help='Período base para el IPC en formato YYYY-MM (ej: 2025-10). Si no se especifica, usa el último disponible'
+    help='Período base del deflactor en formato YYYY-MM (ej: 2025-10). Si no se especifica, usa el último disponible'
+)
+parser.add_argument(
+    '--deflactor',
+    type=str,
+    default=DEFLACTOR_IPC,
+    help='Índice para expresar los valores reales: ipc o un archivo de data/deflactores/ (sin extensión)'
 )
 parser.add_argument(
     '--componente',
@@ -42,23 +55,37 @@ parser.add_argument(
     default='total',
     help='Componente a analizar: total (suma de todos), impuesto_integrado, aporte_sipa, aporte_obra_social, o ingresos_brutos'
 )
+parser.add_argument(
+    '--render',
+    type=str,
+    choices=['auto', 'completo', 'liviano'],
+    default='auto',
+    help=f'Modo de renderizado: liviano usa WebGL, decima las series (LTTB) y guarda valores en float32; '
+         f'auto lo activa con más de {graficos.UMBRAL_WEBGL} puntos'
+)
+parser.add_argument(
+    '--max-puntos',
+    type=int,
+    default=graficos.MAX_PUNTOS_SERIE,
+    help='Máximo de puntos por serie en modo liviano'
+)
+parser.add_argument(
+    '--miniaturas',
+    type=str,
+    choices=miniaturas.FORMATOS + ['no'],
+    default=miniaturas.FORMATO,
+    help='Formato de las miniaturas del índice (requiere kaleido), o no para no generarlas'
+)
+parser.add_argument(
+    '--diferir-miniaturas',
+    action='store_true',
+    help='No renderizar las miniaturas: dejarlas pendientes para renderizar todas juntas con scripts/miniaturas.py'
+)
 
 args = parser.parse_args()
 
-# Cargar los datos
-with open('data/monotributo_historico.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
-
-# Convertir a DataFrame
-df = pd.DataFrame(data['data'])
-
-# Convertir fechas a datetime
-df['start_date'] = pd.to_datetime(df['start_date'])
-df['end_date'] = pd.to_datetime(df['end_date'])
-
-# Agregar el año del período (usando la fecha de inicio)
-df['year'] = df['start_date'].dt.year
-df['period'] = df['start_date'].dt.strftime('%Y-%m')
+# Cargar los datos (DataFrame tipado, con fechas y el período YYYY-MM ya calculados)
+df = cargar_dataframe('data/monotributo_historico.json')
 
 # Crear carpeta para gráficos si no existe
 import os
@@ -80,60 +107,45 @@ else:
 # Filtrar por tipo de actividad
 df_actividad = df[df['tipo_actividad'] == args.tipo].copy()
 
-# Cargar datos de inflación desde Argentina Datos
-print('Cargando datos de inflación desde API...')
-df_ipc = pd.read_json('https://api.argentinadatos.com/v1/finanzas/indices/inflacion')
-
-# Convertir fecha a datetime
-df_ipc['fecha'] = pd.to_datetime(df_ipc['fecha'])
-df_ipc['year_month'] = df_ipc['fecha'].dt.strftime('%Y-%m')
-
-# Ordenar por fecha
-df_ipc = df_ipc.sort_values('fecha')
-
-# Construir índice de precios acumulado
-# Los valores de la API son variaciones mensuales (%), necesitamos convertirlos a índice
-# Fórmula: índice_mes_n = índice_mes_(n-1) × (1 + variación%/100)
-df_ipc['factor_mensual'] = 1 + (df_ipc['valor'] / 100)
-df_ipc['indice_acumulado'] = df_ipc['factor_mensual'].cumprod()
+# Cargar el IPC y los deflactores locales alineados por mes (matriz cacheada en .cache/)
+deflactores = cargar_deflactores()
+try:
+    columna_deflactor = deflactores.columna(args.deflactor)
+except ValueError as e:
+    print(f"Error: {e}")
+    exit(1)
+periodos_deflactor = deflactores.disponibles(args.deflactor)
 
-# Determinar el período base para el IPC
+# Determinar el período base del deflactor
 if args.ipc_base:
     # Validar que el período base existe en los datos
-    if args.ipc_base not in df_ipc['year_month'].values:
-        print(f"Error: El período base '{args.ipc_base}' no está disponible en los datos de IPC")
-        print(f"Períodos disponibles: {df_ipc['year_month'].min()} a {df_ipc['year_month'].max()}")
+    if args.ipc_base not in periodos_deflactor:
+        print(f"Error: El período base '{args.ipc_base}' no está disponible en los datos de {args.deflactor}")
+        print(f"Períodos disponibles: {periodos_deflactor[0]} a {periodos_deflactor[-1]}")
         exit(1)
-
     periodo_base = args.ipc_base
-    indice_base = df_ipc[df_ipc['year_month'] == args.ipc_base]['indice_acumulado'].iloc[0]
-    fecha_base = df_ipc[df_ipc['year_month'] == args.ipc_base]['fecha'].iloc[0]
 else:
     # Usar el último valor disponible en el dataset del monotributo como base
     ultimo_periodo = df_actividad['period'].max()
-    if ultimo_periodo in df_ipc['year_month'].values:
+    if ultimo_periodo in periodos_deflactor:
         periodo_base = ultimo_periodo
-        indice_base = df_ipc[df_ipc['year_month'] == ultimo_periodo]['indice_acumulado'].iloc[0]
-        fecha_base = df_ipc[df_ipc['year_month'] == ultimo_periodo]['fecha'].iloc[0]
     else:
-        # Si no existe, usar el último valor disponible de IPC
-        periodo_base = df_ipc['year_month'].iloc[-1]
-        indice_base = df_ipc['indice_acumulado'].iloc[-1]
-        fecha_base = df_ipc['fecha'].max()
-
-# Normalizar el índice al período base (período base = 100)
-df_ipc['indice_normalizado'] = 100 * (df_ipc['indice_acumulado'] / indice_base)
-
-# Crear diccionario para lookup rápido (usando índice normalizado)
-ipc_dict = dict(zip(df_ipc['year_month'], df_ipc['indice_normalizado']))
-
-# Ajustar montos por inflación
-# monto_real = monto_nominal × (índice_base / índice_periodo)
-# Como normalizamos índice_base = 100, entonces: monto_real = monto_nominal × (100 / índice_periodo)
-df_actividad['monto_real'] = df_actividad.apply(
-    lambda row: row['monto_analizado'] * (100 / ipc_dict.get(row['period'], 100)),
-    axis=1
-)
+        # Si no existe, usar el último valor disponible del deflactor
+        periodo_base = periodos_deflactor[-1]
+fecha_base = pd.Period(periodo_base, freq='M').to_timestamp()
+
+# Ajustar montos contra todos los deflactores en una sola pasada (monto × deflactor)
+# monto_real = monto_nominal × (100 / índice_periodo), con el índice normalizado a 100 en el período base
+reales = deflactores.deflactar(df_actividad['monto_analizado'].to_numpy(dtype='float64'),
+                               df_actividad['period'], periodo_base)
+
+# Los períodos sin dato del deflactor quedan sin valor real (NaN)
+df_actividad['monto_real'] = reales[:, columna_deflactor]
+
+unidad_real = f'pesos de {fecha_base.strftime("%B %Y")}'
+if args.deflactor != DEFLACTOR_IPC:
+    unidad_real += f' según {args.deflactor}'
+sufijo_deflactor = '' if args.deflactor == DEFLACTOR_IPC else f'_{args.deflactor}'
 
 print('=' * 80)
 print('ANÁLISIS DE EVOLUCIÓN DEL MONOTRIBUTO POR CATEGORÍA')
@@ -143,7 +155,15 @@ print(f'Tipo de actividad: {args.tipo}')
 print(f'Categorías disponibles: {", ".join(sorted(df["categoria"].unique()))}')
 print(f'Períodos analizados: {df["year"].min()} - {df["year"].max()}')
 print(f'Total de registros: {len(df_actividad)}')
-print(f'Ajuste por inflación: valores en pesos de {fecha_base.strftime("%B %Y")}')
+print(f'Ajuste por inflación: valores en {unidad_real}')
+
+# Modo de renderizado (liviano para series largas)
+liviano = args.render == 'liviano' or (args.render == 'auto' and len(df_actividad) > graficos.UMBRAL_WEBGL)
+if liviano:
+    print(f'Renderizado liviano: WebGL, hasta {args.max_puntos} puntos por serie')
+
+# Figuras generadas por archivo HTML (para las miniaturas del índice)
+figuras = {}
 
 # Gráfico 1: Evolución de montos por categoría (NOMINALES)
 fig1 = go.Figure()
@@ -152,9 +172,11 @@ categorias_ordenadas = sorted(df_actividad['categoria'].unique())
 
 for categoria in categorias_ordenadas:
     datos_cat = df_actividad[df_actividad['categoria'] == categoria].sort_values('start_date')
-    fig1.add_trace(go.Scatter(
-        x=datos_cat['start_date'],
-        y=datos_cat['monto_analizado'],
+    fig1.add_trace(graficos.serie(
+        datos_cat['start_date'],
+        datos_cat['monto_analizado'],
+        liviano,
+        args.max_puntos,
         mode='lines+markers',
         name=f'Categoría {categoria}',
         line=dict(width=2),
@@ -174,6 +196,7 @@ fig1.update_layout(
 output_prefix = f'monotributo_{args.tipo}_{args.componente}'
 output_file = f'{graficos_dir}/{output_prefix}_nominal.html'
 fig1.write_html(output_file)
+figuras[output_file] = fig1
 print(f'\n✓ Gráfico 1 generado: {output_file}')
 
 # Gráfico 2: Evolución de montos por categoría (AJUSTADOS POR INFLACIÓN)
@@ -181,9 +204,11 @@ fig2 = go.Figure()
 
 for categoria in categorias_ordenadas:
     datos_cat = df_actividad[df_actividad['categoria'] == categoria].sort_values('start_date')
-    fig2.add_trace(go.Scatter(
-        x=datos_cat['start_date'],
-        y=datos_cat['monto_real'],
+    fig2.add_trace(graficos.serie(
+        datos_cat['start_date'],
+        datos_cat['monto_real'],
+        liviano,
+        args.max_puntos,
         mode='lines+markers',
         name=f'Categoría {categoria}',
         line=dict(width=2),
@@ -191,7 +216,7 @@ for categoria in categorias_ordenadas:
     ))
 
 fig2.update_layout(
-    title=f'{componente_label} - Monotributo {args.tipo.capitalize()} - VALORES REALES (pesos de {fecha_base.strftime("%B %Y")})',
+    title=f'{componente_label} - Monotributo {args.tipo.capitalize()} - VALORES REALES ({unidad_real})',
     xaxis_title='Período',
     yaxis_title='Monto ($ constantes)',
     hovermode='x unified',
@@ -200,18 +225,32 @@ fig2.update_layout(
     template='plotly_white'
 )
 
-output_file = f'{graficos_dir}/{output_prefix}_real.html'
+output_file = f'{graficos_dir}/{output_prefix}_real{sufijo_deflactor}.html'
 fig2.write_html(output_file)
+figuras[output_file] = fig2
 print(f'✓ Gráfico 2 generado: {output_file}')
 
 # Gráfico 3: Análisis de incremento porcentual por categoría (NOMINAL vs REAL)
-df_incremento = df_actividad.sort_values('start_date').groupby('categoria').agg({
+df_ordenado = df_actividad.sort_values('start_date')
+df_incremento = df_ordenado.groupby('categoria').agg({
     'monto_analizado': ['first', 'last'],
+    'start_date': ['min', 'max']
+}).reset_index()
+df_incremento.columns = ['categoria', 'monto_inicial', 'monto_final', 'fecha_inicial', 'fecha_final']
+
+# Los valores reales solo existen donde el deflactor tiene dato (puede empezar después que el
+# dataset): se comparan entre el primer y el último período con dato, con sus propias fechas
+df_incremento_real = df_ordenado.dropna(subset=['monto_real']).groupby('categoria').agg({
     'monto_real': ['first', 'last'],
     'start_date': ['min', 'max']
 }).reset_index()
+df_incremento_real.columns = ['categoria', 'monto_real_inicial', 'monto_real_final', 'fecha_real_inicial', 'fecha_real_final']
+df_incremento = df_incremento.merge(df_incremento_real, on='categoria', how='left')
+cobertura_parcial = bool(((df_incremento['fecha_real_inicial'] != df_incremento['fecha_inicial'])
+                          | (df_incremento['fecha_real_final'] != df_incremento['fecha_final'])).any())
+rango_real = (f"{df_incremento['fecha_real_inicial'].min().strftime('%m/%Y')} a "
+              f"{df_incremento['fecha_real_final'].max().strftime('%m/%Y')}") if cobertura_parcial else ''
 
-df_incremento.columns = ['categoria', 'monto_inicial', 'monto_final', 'monto_real_inicial', 'monto_real_final', 'fecha_inicial', 'fecha_final']
 df_incremento['incremento_nominal'] = ((df_incremento['monto_final'] - df_incremento['monto_inicial']) / df_incremento['monto_inicial'] * 100)
 df_incremento['incremento_real'] = ((df_incremento['monto_real_final'] - df_incremento['monto_real_inicial']) / df_incremento['monto_real_inicial'] * 100)
 
@@ -229,7 +268,7 @@ fig3.add_trace(go.Bar(
 fig3.add_trace(go.Bar(
     x=df_incremento['categoria'],
     y=df_incremento['incremento_real'],
-    name='Incremento Real (ajustado por inflación)',
+    name='Incremento Real (ajustado por inflación' + (f', {rango_real})' if cobertura_parcial else ')'),
     text=[f'{val:.0f}%' for val in df_incremento['incremento_real']],
     textposition='outside',
     marker_color='steelblue'
@@ -244,8 +283,9 @@ fig3.update_layout(
     template='plotly_white'
 )
 
-output_file = f'{graficos_dir}/{output_prefix}_incremento.html'
+output_file = f'{graficos_dir}/{output_prefix}_incremento{sufijo_deflactor}.html'
 fig3.write_html(output_file)
+figuras[output_file] = fig3
 print(f'✓ Gráfico 3 generado: {output_file}')
 
 # Gráfico 4: Heatmap de montos REALES por categoría y período
@@ -256,27 +296,27 @@ df_heatmap = df_actividad.pivot_table(
     aggfunc='first'
 )
 
-fig4 = go.Figure(data=go.Heatmap(
-    z=df_heatmap.values,
-    x=df_heatmap.columns,
-    y=df_heatmap.index,
-    colorscale='Blues',
-    text=df_heatmap.values,
+# Con muchas celdas se omite el valor de cada una
+fig4 = go.Figure(data=graficos.heatmap(
+    df_heatmap,
+    liviano,
     texttemplate='$%{text:.0f}',
+    colorscale='Blues',
     textfont={'size': 8},
     colorbar=dict(title='Monto Real ($)')
 ))
 
 fig4.update_layout(
-    title=f'{componente_label} - Mapa de Calor ({args.tipo.capitalize()}, pesos de {fecha_base.strftime("%B %Y")})',
+    title=f'{componente_label} - Mapa de Calor ({args.tipo.capitalize()}, {unidad_real})',
     xaxis_title='Período',
     yaxis_title='Categoría',
     height=600,
     template='plotly_white'
 )
 
-output_file = f'{graficos_dir}/{output_prefix}_heatmap.html'
+output_file = f'{graficos_dir}/{output_prefix}_heatmap{sufijo_deflactor}.html'
 fig4.write_html(output_file)
+figuras[output_file] = fig4
 print(f'✓ Gráfico 4 generado: {output_file}')
 
 # Mostrar tabla resumen
@@ -287,11 +327,15 @@ resumen = df_incremento[['categoria', 'monto_inicial', 'monto_final', 'increment
                          'monto_real_inicial', 'monto_real_final', 'incremento_real']].copy()
 resumen.columns = ['Cat', 'Inicial', 'Final', 'Inc%Nom', 'RealIni', 'RealFin', 'Inc%Real']
 print(resumen.to_string(index=False))
+if cobertura_parcial:
+    print(f'Nota: {args.deflactor} no cubre todo el período analizado; los valores reales, el incremento '
+          f'real y el CAGR real se calculan entre el primer y el último período con dato ({rango_real})')
 
 # Calcular tasa de crecimiento anual promedio (CAGR)
 years_diff = (df_incremento['fecha_final'] - df_incremento['fecha_inicial']).dt.days / 365.25
 df_incremento['cagr_nominal'] = ((df_incremento['monto_final'] / df_incremento['monto_inicial']) ** (1 / years_diff) - 1) * 100
-df_incremento['cagr_real'] = ((df_incremento['monto_real_final'] / df_incremento['monto_real_inicial']) ** (1 / years_diff) - 1) * 100
+years_diff_real = (df_incremento['fecha_real_final'] - df_incremento['fecha_real_inicial']).dt.days / 365.25
+df_incremento['cagr_real'] = ((df_incremento['monto_real_final'] / df_incremento['monto_real_inicial']) ** (1 / years_diff_real.where(years_diff_real > 0)) - 1) * 100
 
 print('\n' + '=' * 80)
 print('TASA DE CRECIMIENTO ANUAL COMPUESTA (CAGR) - NOMINAL VS REAL')
@@ -305,161 +349,45 @@ print('\n' + '=' * 80)
 print('ANÁLISIS DE PÉRDIDA/GANANCIA DE VALOR REAL')
 print('=' * 80)
 for _, row in df_incremento.iterrows():
-    if row['incremento_real'] < 0:
+    if pd.isna(row['incremento_real']):
+        print(f"Categoría {row['categoria']}: sin datos de {args.deflactor} para el período")
+    elif row['incremento_real'] < 0:
         print(f"Categoría {row['categoria']}: PÉRDIDA de {abs(row['incremento_real']):.1f}% en términos reales")
     elif row['incremento_real'] > 0:
         print(f"Categoría {row['categoria']}: GANANCIA de {row['incremento_real']:.1f}% en términos reales")
     else:
         print(f"Categoría {row['categoria']}: SIN CAMBIO en términos reales")
 
+# Incremento real con cada deflactor registrado (ya calculados en la misma pasada)
+if len(deflactores.nombres) > 1:
+    print('\n' + '=' * 80)
+    print('INCREMENTO REAL (%) POR DEFLACTOR (entre el primer y el último período con dato de cada índice)')
+    print('=' * 80)
+    df_reales = pd.DataFrame(reales, columns=deflactores.nombres, index=df_actividad.index)
+    df_reales[['categoria', 'start_date']] = df_actividad[['categoria', 'start_date']]
+    extremos = df_reales.sort_values('start_date').groupby('categoria', observed=True)[deflactores.nombres]
+    incremento_deflactores = (extremos.last() / extremos.first() - 1) * 100
+    print(incremento_deflactores.round(1).to_string())
+
 print('\n' + '=' * 80)
 print('✓ Análisis completado exitosamente!')
 print(f'Se generaron 4 archivos HTML con gráficos interactivos en {graficos_dir}/:')
 print(f'  1. {output_prefix}_nominal.html - Evolución valores nominales')
-print(f'  2. {output_prefix}_real.html - Evolución valores reales (ajustados por IPC)')
-print(f'  3. {output_prefix}_incremento.html - Comparación incremental nominal vs real')
-print(f'  4. {output_prefix}_heatmap.html - Mapa de calor valores reales')
+print(f'  2. {output_prefix}_real{sufijo_deflactor}.html - Evolución valores reales (ajustados por {args.deflactor.upper()})')
+print(f'  3. {output_prefix}_incremento{sufijo_deflactor}.html - Comparación incremental nominal vs real')
+print(f'  4. {output_prefix}_heatmap{sufijo_deflactor}.html - Mapa de calor valores reales')
 print('=' * 80)
 
-# Generar index.html usando Jinja2
-import glob
-from datetime import datetime as dt
-from jinja2 import Template
-
-def parse_filename_to_title(basename):
-    """Parsea el nombre de archivo y genera un título legible"""
-    # Formato: monotributo_{tipo}_{componente}_{grafico}.html
-    parts = basename.replace('monotributo_', '').replace('.html', '').split('_')
-    title_parts = []
-
-    # Tipo de actividad (servicios/ventas)
-    if 'servicios' in parts:
-        title_parts.append('Servicios')
-        parts.remove('servicios')
-    elif 'ventas' in parts:
-        title_parts.append('Ventas')
-        parts.remove('ventas')
-
-    # Identificar el componente completo
-    if 'impuesto' in parts and 'integrado' in parts:
-        title_parts.append('Impuesto Integrado')
-        parts = [p for p in parts if p not in ['impuesto', 'integrado']]
-    elif 'aporte' in parts and 'sipa' in parts:
-        title_parts.append('Aporte SIPA')
-        parts = [p for p in parts if p not in ['aporte', 'sipa']]
-    elif 'obra' in parts and 'social' in parts:
-        title_parts.append('Aporte Obra Social')
-        parts = [p for p in parts if p not in ['aporte', 'obra', 'social']]
-    elif 'total' in parts:
-        title_parts.append('Total')
-        parts.remove('total')
-
-    # Tipo de gráfico
-    grafico_map = {
-        'nominal': 'Nominal',
-        'real': 'Real',
-        'incremento': 'Incremento',
-        'heatmap': 'Mapa de Calor'
-    }
-
-    for part in parts:
-        if part in grafico_map:
-            title_parts.append(grafico_map[part])
-            break
-
-    return ' - '.join(title_parts) if title_parts else basename
-
-# Obtener fecha de última actualización de los datos
-try:
-    datos_timestamp = os.path.getmtime('data/monotributo_historico.json')
-    fecha_datos = dt.fromtimestamp(datos_timestamp).strftime('%d/%m/%Y %H:%M:%S')
-except:
-    fecha_datos = 'No disponible'
-
-# Obtener archivos HTML y preparar datos
-html_files = sorted(glob.glob(f'{graficos_dir}/monotributo_*.html'))
-
-file_descriptions = {
-    'nominal': 'Evolución en valores nominales',
-    'real': 'Evolución ajustada por inflación (valores reales)',
-    'incremento': 'Comparación de incrementos: nominal vs real',
-    'heatmap': 'Mapa de calor por período y categoría'
-}
-
-graficos = []
-for html_file in html_files:
-    basename = os.path.basename(html_file)
-    title = parse_filename_to_title(basename)
-
-    # Determinar descripción
-    desc = 'Gráfico del monotributo'
-    for key, value in file_descriptions.items():
-        if key in basename:
-            desc = value
-            break
-
-    # Extraer componente del nombre del archivo
-    # Formato: monotributo_{tipo}_{componente}_{grafico}.html
-    parts = basename.replace('monotributo_', '').replace('.html', '').split('_')
-
-    # Identificar el componente
-    componente = None
-    if 'impuesto' in parts and 'integrado' in parts:
-        componente = 'impuesto_integrado'
-    elif 'aporte' in parts and 'sipa' in parts:
-        componente = 'aporte_sipa'
-    elif 'obra' in parts and 'social' in parts:
-        componente = 'aporte_obra_social'
-    elif 'ingresos' in parts and 'brutos' in parts:
-        componente = 'ingresos_brutos'
-    elif 'total' in parts:
-        componente = 'total'
-
-    graficos.append({
-        'filename': f'{graficos_dir}/{basename}',  # Ruta relativa con carpeta
-        'title': title,
-        'description': desc,
-        'componente': componente
-    })
-
-# Agrupar gráficos por componente
-from collections import defaultdict
-graficos_por_componente = defaultdict(list)
-for grafico in graficos:
-    comp = grafico['componente']
-    if comp:
-        graficos_por_componente[comp].append(grafico)
-
-# Ordenar componentes y convertir a lista de tuplas
-componente_labels = {
-    'total': 'Total Mensual',
-    'impuesto_integrado': 'Impuesto Integrado',
-    'aporte_sipa': 'Aporte Jubilatorio (SIPA)',
-    'aporte_obra_social': 'Aporte Obra Social',
-    'ingresos_brutos': 'Ingresos Brutos'
-}
-
-componentes_ordenados = ['total', 'ingresos_brutos', 'impuesto_integrado', 'aporte_sipa', 'aporte_obra_social']
-graficos_agrupados = [
-    {
-        'componente': comp,
-        'label': componente_labels.get(comp, comp),
-        'graficos': graficos_por_componente[comp]
-    }
-    for comp in componentes_ordenados
-    if comp in graficos_por_componente
-]
-
-# Cargar template y renderizar
-with open('index.jinja', 'r', encoding='utf-8') as f:
-    template = Template(f.read())
-
-html_output = template.render(
-    fecha_datos=fecha_datos,
-    graficos_agrupados=graficos_agrupados
-)
-
-with open('index.html', 'w', encoding='utf-8') as f:
-    f.write(html_output)
+# Miniaturas de los gráficos nuevos o modificados, todas en una sola exportación
+if args.miniaturas != 'no' and args.diferir_miniaturas:
+    diferidas = miniaturas.diferir(figuras, graficos_dir, args.miniaturas)
+    print(f'✓ Miniaturas: {diferidas} pendiente(s) en {miniaturas.PENDIENTES_DIR}/ (renderizar con scripts/miniaturas.py)')
+elif args.miniaturas != 'no':
+    renderizadas = miniaturas.generar(figuras, graficos_dir, args.miniaturas)
+    if renderizadas is not None:
+        print(f'✓ Miniaturas: {renderizadas} renderizada(s), {len(figuras) - renderizadas} sin cambios (caché)')
+
+# Generar index.html con todos los gráficos disponibles
+indice.generar(graficos_dir)
 
 print('✓ Generado index.html con todos los gráficos disponibles')
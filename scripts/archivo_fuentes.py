@@ -0,0 +1,182 @@
+#!/usr/bin/env -S uv run
+# /// script
+# dependencies = [
+#   "requests",
+#   "pdfplumber",
+#   "beautifulsoup4",
+#   "urllib3",
+#   "pandas",
+# ]
+# ///
+"""
+Archivo local de las fuentes descargadas (página actual de AFIP, PDFs e IPC)
+Cada descarga se guarda comprimida y direccionada por el hash de su contenido (una misma
+respuesta se guarda una sola vez), con un índice de qué se descargó, de dónde y cuándo.
+`replay` vuelve a correr los parsers sobre todo el archivo en paralelo y sin red
+"""
+
+import io
+import json
+import gzip
+import hashlib
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import escritura
+
+ARCHIVO_DIR = Path("data/fuentes")
+INDICE_FILE = "indice.jsonl"
+
+TIPO_ACTUAL = "actual"
+TIPO_PDF = "pdf"
+TIPO_IPC = "ipc"
+TIPOS = [TIPO_ACTUAL, TIPO_PDF, TIPO_IPC]
+
+
+class Archivo:
+    """Objetos comprimidos en objetos/<hash[:2]>/<hash>.gz más el índice indice.jsonl"""
+
+    def __init__(self, directorio: Path = ARCHIVO_DIR):
+        self.directorio = Path(directorio)
+        self.indice_path = self.directorio / INDICE_FILE
+        self._conocidos = None
+
+    def objeto_path(self, sha256: str) -> Path:
+        return self.directorio / "objetos" / sha256[:2] / f"{sha256}.gz"
+
+    def entradas(self, tipo: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entradas del índice (en orden de descarga), opcionalmente de un tipo"""
+        if not self.indice_path.exists():
+            return []
+        with open(self.indice_path, 'r', encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        return [e for e in entries if tipo is None or e['tipo'] == tipo]
+
+    def guardar(self, tipo: str, url: str, content: bytes, fecha: Optional[datetime] = None,
+                descargado: bool = True, **metadata) -> str:
+        """
+        Guarda una descarga en el archivo
+        Retorna: hash SHA-256 del contenido
+
+        El contenido se comprime una sola vez por hash; el índice registra cada descarga con
+        su fecha, así el replay puede reconstruir desde cuándo y hasta cuándo se vio cada
+        versión de una fuente. Con `descargado=False` (una copia local que no se volvió a
+        descargar) solo se registra si esa combinación de (tipo, url, contenido) es nueva.
+        """
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = self.objeto_path(sha256)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # mtime=0: el mismo contenido produce siempre el mismo archivo
+            escritura.write_bytes_atomic(path, gzip.compress(content, compresslevel=9, mtime=0))
+
+        if self._conocidos is None:
+            self._conocidos = {(e['tipo'], e['url'], e['sha256']) for e in self.entradas()}
+        if descargado or (tipo, url, sha256) not in self._conocidos:
+            entry = {
+                "sha256": sha256,
+                "tipo": tipo,
+                "url": url,
+                "fecha": (fecha or datetime.now(timezone.utc)).isoformat(timespec='seconds'),
+                "bytes": len(content),
+                **metadata,
+            }
+            self.directorio.mkdir(parents=True, exist_ok=True)
+            escritura.append_line(self.indice_path, json.dumps(entry, ensure_ascii=False))
+            self._conocidos.add((tipo, url, sha256))
+        return sha256
+
+    def leer(self, sha256: str) -> bytes:
+        """Contenido original de un objeto (verifica el hash)"""
+        with gzip.open(self.objeto_path(sha256), 'rb') as f:
+            content = f.read()
+        if hashlib.sha256(content).hexdigest() != sha256:
+            raise ValueError(f"El objeto {sha256} está dañado (el hash no coincide)")
+        return content
+
+
+def parsear(entrada: Dict[str, Any], directorio: str) -> Dict[str, Any]:
+    """
+    Vuelve a parsear una fuente archivada con los parsers actuales
+    Retorna: la entrada del índice con los registros obtenidos (o el error)
+    """
+    # Los parsers se importan acá para que el archivo no dependa de ellos al descargar
+    import scrape_actual
+    import scrape_historico
+
+    resultado = dict(entrada)
+    try:
+        content = Archivo(Path(directorio)).leer(entrada['sha256'])
+        # Los parsers informan su avance por consola; en el replay solo interesa el resultado
+        with contextlib.redirect_stdout(io.StringIO()):
+            if entrada['tipo'] == TIPO_ACTUAL:
+                # La página puede no informar su vigencia: se usa la fecha de la descarga
+                registros, _, _ = scrape_actual.parse_current_html(content, datetime.fromisoformat(entrada['fecha']))
+            elif entrada['tipo'] == TIPO_PDF:
+                registros = scrape_historico.extract_pdf_records(io.BytesIO(content), entrada['periodo'])
+            else:
+                registros = json.loads(content)
+        resultado['registros'] = registros
+    except Exception as e:
+        resultado['error'] = f"{type(e).__name__}: {e}"
+    return resultado
+
+
+def replay(directorio: Path = ARCHIVO_DIR, tipo: Optional[str] = None,
+           procesos: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Parsea todas las fuentes archivadas en un pool de procesos (sin acceso a la red)"""
+    entradas = Archivo(directorio).entradas(tipo)
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        futures = [executor.submit(parsear, entrada, str(directorio)) for entrada in entradas]
+        return [future.result() for future in futures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archivo local de las fuentes descargadas de AFIP e IPC')
+    parser.add_argument('--directorio', default=str(ARCHIVO_DIR), help='Directorio del archivo')
+    subparsers = parser.add_subparsers(dest='accion', required=True)
+
+    listar = subparsers.add_parser('listar', help='Listar las fuentes archivadas')
+    listar.add_argument('--tipo', choices=TIPOS, default=None, help='Solo un tipo de fuente')
+
+    rep = subparsers.add_parser('replay', help='Volver a parsear todas las fuentes archivadas, sin red')
+    rep.add_argument('--tipo', choices=TIPOS, default=None, help='Solo un tipo de fuente')
+    rep.add_argument('--procesos', type=int, default=None, help='Procesos en paralelo (default: CPUs)')
+    rep.add_argument('--salida', default=None, help='Guardar los registros de cada fuente en este archivo JSON')
+    args = parser.parse_args()
+
+    directorio = Path(args.directorio)
+
+    if args.accion == 'listar':
+        print("=" * 80)
+        print("FUENTES ARCHIVADAS")
+        print("=" * 80)
+        for entrada in Archivo(directorio).entradas(args.tipo):
+            detalle = f" ({entrada['periodo']})" if 'periodo' in entrada else ""
+            print(f"{entrada['fecha']}  {entrada['tipo']:<7} {entrada['sha256'][:12]}  "
+                  f"{entrada['bytes'] / 1024:>8.1f} KB  {entrada['url']}{detalle}")
+        return
+
+    print("=" * 80)
+    print("REPLAY DE FUENTES ARCHIVADAS")
+    print("=" * 80)
+
+    resultados = replay(directorio, args.tipo, args.procesos)
+    errores = [r for r in resultados if 'error' in r]
+    for resultado in resultados:
+        estado = f"✗ {resultado['error']}" if 'error' in resultado else f"✓ {len(resultado['registros'])} registro(s)"
+        print(f"{resultado['fecha']}  {resultado['tipo']:<7} {resultado['sha256'][:12]}  {estado}")
+
+    print(f"\n✓ {len(resultados) - len(errores)} fuente(s) parseadas, {len(errores)} con errores")
+
+    if args.salida:
+        escritura.write_json_atomic(args.salida, resultados)
+        print(f"✓ Resultados guardados en: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Detección de columnas de las tablas de categorías del monotributo
+Mapea los encabezados (de los PDFs o del HTML de AFIP) a los campos normalizados
+y cachea el mapeo por formato de tabla
+"""
+
+import re
+from typing import Dict, Optional, Sequence, Tuple
+
+# Campos que se leen de cada fila de datos
+CAMPOS = [
+    "ingresos_brutos",
+    "superficie_afectada",
+    "energia_electrica",
+    "alquileres_devengados",
+    "precio_unitario_maximo",
+    "impuesto_servicios",
+    "impuesto_ventas",
+    "aporte_sipa",
+    "aporte_obra_social",
+    "total_servicios",
+    "total_ventas",
+]
+
+# Sin estos campos la tabla no se puede interpretar
+CAMPOS_REQUERIDOS = ["aporte_sipa", "aporte_obra_social", "total_servicios"]
+
+# Palabras clave de cada columna (se evalúan en orden)
+KEYWORDS = [
+    ("categ", "categoria"),
+    ("ingresos", "ingresos_brutos"),
+    ("sup", "superficie_afectada"),
+    ("energ", "energia_electrica"),
+    ("alquiler", "alquileres_devengados"),
+    ("precio", "precio_unitario_maximo"),
+    ("sipa", "aporte_sipa"),
+    ("obra", "aporte_obra_social"),
+    ("actividad", None),
+    ("empleados", None),
+]
+
+# Cache de mapeos por huella del formato (texto de encabezado de cada columna)
+LAYOUT_CACHE: Dict[Tuple[str, ...], Dict[str, int]] = {}
+
+
+class LayoutDrift(ValueError):
+    """El encabezado de la tabla no coincide con el formato esperado"""
+
+
+def column_labels(header_rows: Sequence[Sequence[str]], width: int) -> Tuple[str, ...]:
+    """Une el texto de encabezado de cada columna (en minúsculas y con espacios simples)"""
+    labels = []
+    for idx in range(width):
+        parts = [row[idx] for row in header_rows if idx < len(row) and row[idx]]
+        labels.append(re.sub(r"\s+", " ", " ".join(parts)).strip().lower())
+    return tuple(labels)
+
+
+def classify(label: str) -> Optional[str]:
+    """Campo correspondiente a un encabezado (sin resolver servicios/ventas)"""
+    for keyword, field in KEYWORDS:
+        if keyword in label:
+            return field
+    return None
+
+
+def map_columns(header_rows: Sequence[Sequence[str]], width: int) -> Dict[str, int]:
+    """
+    Mapea los encabezados de una tabla a índices de columna
+
+    Las columnas de impuesto integrado y total están divididas en servicios ("Locaciones y/o
+    prestaciones de servicios") y ventas ("Venta de cosas muebles"); el grupo se toma del
+    encabezado de la propia columna o del más cercano a la izquierda.
+    """
+    fingerprint = column_labels(header_rows, width)
+    if fingerprint in LAYOUT_CACHE:
+        return LAYOUT_CACHE[fingerprint]
+
+    column_map: Dict[str, int] = {}
+    group = None
+    for idx, label in enumerate(fingerprint):
+        if not label:
+            continue
+
+        field = classify(label)
+        if field is None:
+            if "impuesto" in label:
+                group = "impuesto"
+            elif "total" in label:
+                group = "total"
+
+            if "venta" in label:
+                variant = "ventas"
+            elif "locaciones" in label or "prestaciones" in label or "servicios" in label:
+                variant = "servicios"
+            else:
+                continue
+
+            if group is None:
+                continue
+            field = f"{group}_{variant}"
+        else:
+            group = None
+
+        if field in column_map:
+            raise LayoutDrift(f"Columna '{field}' duplicada en el encabezado: {fingerprint}")
+        column_map[field] = idx
+
+    missing = [field for field in CAMPOS_REQUERIDOS if field not in column_map]
+    if missing:
+        raise LayoutDrift(f"Faltan columnas {missing} en el encabezado: {fingerprint}")
+
+    LAYOUT_CACHE[fingerprint] = column_map
+    return column_map
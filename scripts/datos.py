@@ -0,0 +1,154 @@
+"""
+Carga del dataset del monotributo como DataFrame tipado
+Guarda un snapshot binario en .cache/ (validado por hash y fecha de modificación del JSON)
+y memoiza el resultado dentro del proceso, así las cargas repetidas no vuelven a parsear
+el JSON ni a convertir fechas. También carga la serie de IPC con su índice acumulado
+"""
+
+import os
+import json
+import pickle
+import hashlib
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+import pandas as pd
+
+import escritura
+
+DATA_JSON = "data/monotributo_historico.json"
+IPC_JSON = "data/ipc.json"
+IPC_URL = "https://api.argentinadatos.com/v1/finanzas/indices/inflacion"
+CACHE_DIR = Path(".cache")
+
+# Cambiar si cambia la forma del DataFrame, para invalidar los snapshots existentes
+SNAPSHOT_VERSION = 1
+
+COLUMNAS_CATEGORICAS = ["categoria", "tipo_actividad"]
+COLUMNAS_ENTERAS = [
+    "ingresos_brutos",
+    "alquileres_devengados",
+    "precio_unitario_maximo",
+    "impuesto_integrado",
+    "aporte_sipa",
+    "aporte_obra_social",
+    "total",
+]
+
+# Memo en proceso: ruta → (mtime_ns, tamaño, DataFrame)
+_MEMO: Dict[str, Tuple[int, int, pd.DataFrame]] = {}
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 del contenido del archivo"""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def build_dataframe(data: Dict[str, Any]) -> pd.DataFrame:
+    """Convierte el JSON del dataset en un DataFrame con tipos definitivos"""
+    df = pd.DataFrame(data['data'])
+
+    df['start_date'] = pd.to_datetime(df['start_date'], format='%Y-%m-%d')
+    df['end_date'] = pd.to_datetime(df['end_date'], format='%Y-%m-%d')
+    for column in COLUMNAS_CATEGORICAS:
+        df[column] = df[column].astype('category')
+    for column in COLUMNAS_ENTERAS:
+        df[column] = df[column].astype('Int64')
+
+    # Columnas derivadas que usan los análisis
+    df['year'] = df['start_date'].dt.year
+    df['period'] = df['start_date'].dt.strftime('%Y-%m')
+    return df
+
+
+def snapshot_path(path: Path, cache_dir: Path) -> Path:
+    """Ruta del snapshot correspondiente a un archivo de datos"""
+    return Path(cache_dir) / f"{path.stem}.v{SNAPSHOT_VERSION}.pkl"
+
+
+def load_snapshot(snapshot: Path) -> Optional[Dict[str, Any]]:
+    """Lee un snapshot (None si no existe o no se puede leer)"""
+    try:
+        with open(snapshot, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def save_snapshot(snapshot: Path, entry: Dict[str, Any]):
+    """Escribe un snapshot de forma atómica (otros procesos pueden estar leyéndolo)"""
+    snapshot.parent.mkdir(parents=True, exist_ok=True)
+    escritura.write_bytes_atomic(snapshot, pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def cargar_dataframe(path: str = DATA_JSON, cache_dir: Path = CACHE_DIR) -> pd.DataFrame:
+    """
+    Carga el dataset como DataFrame tipado
+
+    Fechas como datetime64, categoría y tipo de actividad como categóricas, montos como
+    enteros nulables, más las columnas `year` y `period` (YYYY-MM). Se usa, en orden:
+    el memo del proceso, el snapshot de .cache/ y, si ninguno coincide con el archivo
+    actual, el JSON (regenerando el snapshot). Retorna una copia que se puede modificar.
+    """
+    source = Path(path)
+    stat = source.stat()
+    key = str(source.resolve())
+
+    memo = _MEMO.get(key)
+    if memo is not None and memo[:2] == (stat.st_mtime_ns, stat.st_size):
+        return memo[2].copy()
+
+    snapshot = snapshot_path(source, cache_dir)
+    entry = load_snapshot(snapshot)
+    if entry is not None and (entry['mtime_ns'], entry['size']) != (stat.st_mtime_ns, stat.st_size):
+        # Cambió la fecha de modificación (ej: checkout de git): se valida por contenido
+        if entry['size'] == stat.st_size and entry['sha256'] == file_hash(source):
+            entry['mtime_ns'] = stat.st_mtime_ns
+            save_snapshot(snapshot, entry)
+        else:
+            entry = None
+
+    if entry is None:
+        content = source.read_bytes()
+        entry = {
+            'sha256': hashlib.sha256(content).hexdigest(),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'df': build_dataframe(json.loads(content)),
+        }
+        try:
+            save_snapshot(snapshot, entry)
+        except OSError as e:
+            print(f"⚠ No se pudo guardar el snapshot en {snapshot}: {e}")
+
+    _MEMO[key] = (entry['mtime_ns'], entry['size'], entry['df'])
+    return entry['df'].copy()
+
+
+def cargar_ipc(path: str = IPC_JSON, url: str = IPC_URL) -> pd.DataFrame:
+    """
+    Carga la serie de inflación mensual y construye el índice de precios acumulado
+
+    Usa la copia local si existe (la descarga actualizar.py) y si no la API de Argentina Datos.
+    Columnas: fecha, valor (variación mensual %), year_month, factor_mensual, indice_acumulado.
+    """
+    if os.path.exists(path):
+        print(f'Cargando datos de inflación desde {path}...')
+        df_ipc = pd.read_json(path)
+    else:
+        print('Cargando datos de inflación desde API...')
+        df_ipc = pd.read_json(url)
+
+    # Convertir fecha a datetime
+    df_ipc['fecha'] = pd.to_datetime(df_ipc['fecha'])
+    df_ipc['year_month'] = df_ipc['fecha'].dt.strftime('%Y-%m')
+
+    # Ordenar por fecha
+    df_ipc = df_ipc.sort_values('fecha')
+
+    # Construir índice de precios acumulado
+    # Los valores de la API son variaciones mensuales (%), necesitamos convertirlos a índice
+    # Fórmula: índice_mes_n = índice_mes_(n-1) × (1 + variación%/100)
+    df_ipc['factor_mensual'] = 1 + (df_ipc['valor'] / 100)
+    df_ipc['indice_acumulado'] = df_ipc['factor_mensual'].cumprod()
+    return df_ipc
@@ -0,0 +1,196 @@
+#!/usr/bin/env -S uv run
+# /// script
+# dependencies = [
+#   "numpy",
+#   "pandas",
+# ]
+# ///
+"""
+Registro de deflactores para expresar los montos en valores reales
+Además del IPC, toma índices alternativos desde archivos locales en data/deflactores/
+(salarios, UVA/CER, tipo de cambio, etc.), los alinea en un calendario mensual común en
+una sola matriz de NumPy (mes × deflactor) cacheada en .cache/, y deflacta un lote de
+montos contra todos los deflactores a la vez
+"""
+
+import io
+import hashlib
+import argparse
+from pathlib import Path
+from typing import List, Dict
+
+import numpy as np
+import pandas as pd
+
+import escritura
+from datos import CACHE_DIR, IPC_JSON, cargar_ipc
+
+DEFLACTORES_DIR = Path("data/deflactores")
+DEFLACTOR_IPC = "ipc"
+EXTENSIONES = (".csv", ".json")
+
+# Cambiar si cambia la forma de la matriz, para invalidar el caché existente
+CACHE_VERSION = 1
+
+
+class Deflactores:
+    """Índices de todos los deflactores alineados por mes: matriz (mes × deflactor), NaN sin dato"""
+
+    def __init__(self, nombres: List[str], meses: pd.PeriodIndex, matriz: np.ndarray):
+        self.nombres = nombres
+        self.meses = meses
+        self.matriz = matriz
+
+    def columna(self, nombre: str) -> int:
+        if nombre not in self.nombres:
+            raise ValueError(f"Deflactor desconocido: '{nombre}' (disponibles: {', '.join(self.nombres)})")
+        return self.nombres.index(nombre)
+
+    def disponibles(self, nombre: str) -> List[str]:
+        """Meses (YYYY-MM) con dato para un deflactor"""
+        con_dato = ~np.isnan(self.matriz[:, self.columna(nombre)])
+        return [str(m) for m in self.meses[con_dato]]
+
+    def posiciones(self, periodos: pd.Series) -> np.ndarray:
+        """Fila de la matriz de cada período YYYY-MM (-1 si queda fuera del calendario)"""
+        ordinales = pd.PeriodIndex(periodos, freq='M').asi8 - self.meses[0].ordinal
+        return np.where((ordinales >= 0) & (ordinales < len(self.meses)), ordinales, -1)
+
+    def deflactar(self, montos: np.ndarray, periodos: pd.Series, base: str) -> np.ndarray:
+        """
+        Expresa los montos en valores del mes `base` según cada deflactor
+        Retorna: array (monto × deflactor), NaN donde el deflactor no tiene dato del período
+
+        monto_real = monto × (100 / índice del período), con el índice normalizado a 100 en
+        el mes base. Si un deflactor no tiene dato del mes base se usa su último mes con dato
+        (los incrementos reales no dependen del mes base).
+        """
+        fila_base = self.posiciones(pd.Series([base]))[0]
+        bases = np.empty(len(self.nombres), dtype='int64')
+        for j in range(len(self.nombres)):
+            con_dato = np.flatnonzero(~np.isnan(self.matriz[:, j]))
+            bases[j] = fila_base if fila_base in con_dato else con_dato[-1]
+
+        indices = 100 * (self.matriz / self.matriz[bases, np.arange(len(self.nombres))])
+
+        pos = self.posiciones(periodos)
+        dentro = pos >= 0
+        montos = np.asarray(montos, dtype='float64')
+        reales = np.full((len(pos), len(self.nombres)), np.nan)
+        reales[dentro] = montos[dentro, None] * (100 / indices[pos[dentro]])
+        return reales
+
+
+def leer_serie(path: Path) -> pd.Series:
+    """
+    Lee un deflactor desde un archivo local (CSV o JSON) como nivel del índice por mes
+
+    El archivo tiene una columna `fecha` y además `indice` (nivel: UVA, CER, tipo de cambio,
+    índice de salarios...) o `valor` (variación mensual %, como la serie de IPC). Con datos
+    diarios, el nivel del mes es el promedio y las variaciones se componen.
+    """
+    df = pd.read_json(path) if path.suffix == '.json' else pd.read_csv(path)
+    df['fecha'] = pd.to_datetime(df['fecha'])
+    df = df.sort_values('fecha')
+    mes = df['fecha'].dt.to_period('M')
+
+    if 'indice' in df.columns:
+        return df.groupby(mes)['indice'].mean()
+    if 'valor' in df.columns:
+        return (1 + df['valor'] / 100).groupby(mes).prod().cumprod()
+    raise ValueError(f"{path}: se esperaba una columna 'indice' (nivel) o 'valor' (variación mensual %)")
+
+
+def fuentes(directorio: Path = DEFLACTORES_DIR) -> Dict[str, Path]:
+    """Archivos locales de deflactores: nombre (sin extensión) → ruta"""
+    if not directorio.exists():
+        return {}
+    archivos = {}
+    for path in sorted(directorio.iterdir()):
+        if path.suffix not in EXTENSIONES:
+            continue
+        if path.stem == DEFLACTOR_IPC or path.stem in archivos:
+            raise ValueError(f"{path}: ya hay un deflactor llamado '{path.stem}'")
+        archivos[path.stem] = path
+    return archivos
+
+
+def cache_key(paths: Dict[str, Path]) -> str:
+    """Hash del contenido de todas las fuentes (cambia si se agrega, quita o modifica alguna)"""
+    h = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for nombre, path in paths.items():
+        h.update(nombre.encode())
+        h.update(hashlib.sha256(path.read_bytes()).digest())
+    return h.hexdigest()
+
+
+def alinear(series: Dict[str, pd.Series]) -> Deflactores:
+    """Alinea todas las series en un calendario mensual común"""
+    desde = min(s.index.min() for s in series.values())
+    hasta = max(s.index.max() for s in series.values())
+    meses = pd.period_range(desde, hasta, freq='M')
+
+    matriz = np.full((len(meses), len(series)), np.nan)
+    for j, serie in enumerate(series.values()):
+        matriz[:, j] = serie.reindex(meses).to_numpy(dtype='float64')
+    return Deflactores(list(series), meses, matriz)
+
+
+def cargar_deflactores(directorio: Path = DEFLACTORES_DIR, ipc_path: str = IPC_JSON,
+                       cache_dir: Path = CACHE_DIR) -> Deflactores:
+    """
+    Carga el IPC y todos los deflactores locales como una única matriz
+
+    La matriz se guarda en .cache/deflactores.npz junto con el hash de las fuentes y se
+    reutiliza mientras no cambien. Si no hay copia local del IPC (se descarga de la API)
+    no se usa el caché.
+    """
+    locales = fuentes(Path(directorio))
+    cache = None
+    if Path(ipc_path).exists():
+        key = cache_key({DEFLACTOR_IPC: Path(ipc_path), **locales})
+        cache = Path(cache_dir) / f"deflactores.v{CACHE_VERSION}.npz"
+        if cache.exists():
+            with np.load(cache, allow_pickle=False) as npz:
+                if str(npz['clave']) == key:
+                    meses = pd.PeriodIndex.from_ordinals(npz['meses'], freq='M')
+                    return Deflactores([str(n) for n in npz['nombres']], meses, npz['matriz'])
+
+    df_ipc = cargar_ipc(ipc_path)
+    series = {DEFLACTOR_IPC: pd.Series(
+        df_ipc['indice_acumulado'].to_numpy(),
+        index=df_ipc['fecha'].dt.to_period('M'),
+    ).groupby(level=0).last()}
+    for nombre, path in locales.items():
+        series[nombre] = leer_serie(path)
+
+    deflactores = alinear(series)
+    if cache is not None:
+        try:
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            buffer = io.BytesIO()
+            np.savez(buffer, clave=np.array(key), nombres=np.array(deflactores.nombres),
+                     meses=deflactores.meses.asi8, matriz=deflactores.matriz)
+            escritura.write_bytes_atomic(cache, buffer.getvalue())
+        except OSError as e:
+            print(f"⚠ No se pudo guardar el caché de deflactores en {cache}: {e}")
+    return deflactores
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lista los deflactores disponibles y su cobertura')
+    parser.add_argument('--directorio', default=str(DEFLACTORES_DIR), help='Directorio de deflactores locales')
+    args = parser.parse_args()
+
+    deflactores = cargar_deflactores(Path(args.directorio))
+
+    print("=" * 80)
+    print("DEFLACTORES DISPONIBLES")
+    print("=" * 80)
+    for nombre in deflactores.nombres:
+        meses = deflactores.disponibles(nombre)
+        print(f"{nombre:<20} {meses[0]} → {meses[-1]} ({len(meses)} meses)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Escritura atómica de archivos
+Se escribe en un archivo temporal junto al destino, se fuerza a disco y se renombra: si el
+proceso se corta, el destino conserva la versión anterior completa y nunca queda a medias
+"""
+
+import os
+import json
+from pathlib import Path
+from typing import Any, Union
+
+
+def write_bytes_atomic(path: Union[str, Path], content: bytes):
+    """Escribe `content` en `path` reemplazando el archivo de forma atómica"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(path: Union[str, Path], data: Any):
+    """Escribe un JSON (formato del dataset: UTF-8, indentado) reemplazando el archivo de forma atómica"""
+    write_bytes_atomic(path, json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8'))
+
+
+def append_line(path: Union[str, Path], line: str):
+    """Agrega una línea a un registro de solo agregado (JSON Lines) y la fuerza a disco"""
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(line + "\n")
+        f.flush()
+        os.fsync(f.fileno())
@@ -0,0 +1,101 @@
+"""
+Utilidades de renderizado para los gráficos del monotributo
+Modo liviano para series largas: WebGL (Scattergl), decimación LTTB que conserva la forma
+de la serie y valores en float32 en el JSON de la figura
+"""
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Con más puntos que esto por gráfico, el modo automático pasa a renderizado liviano
+UMBRAL_WEBGL = 1000
+
+# Puntos que se conservan por serie en modo liviano (suficiente para el ancho de la pantalla)
+MAX_PUNTOS_SERIE = 500
+
+# Con más celdas que esto, el mapa de calor no muestra el valor en cada celda
+MAX_CELDAS_TEXTO = 1000
+
+
+def lttb(x: np.ndarray, y: np.ndarray, puntos: int) -> np.ndarray:
+    """
+    Decimación Largest-Triangle-Three-Buckets
+    Retorna: índices de los puntos a conservar (incluye el primero y el último)
+
+    Divide la serie en `puntos - 2` grupos y de cada uno conserva el punto que forma el
+    triángulo de mayor área con el punto elegido antes y el promedio del grupo siguiente,
+    así se mantienen los picos y cambios de tendencia.
+    """
+    n = len(x)
+    if puntos >= n or puntos < 3:
+        return np.arange(n)
+
+    x = x.astype('float64')
+    y = y.astype('float64')
+    edges = np.linspace(1, n - 1, puntos - 1).astype('int64')
+
+    selected = np.empty(puntos, dtype='int64')
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket in range(puntos - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(area.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+
+def float32(values: Any) -> np.ndarray:
+    """Valores en float32: el JSON de la figura ocupa la mitad que con float64"""
+    return np.asarray(pd.to_numeric(pd.Series(values), errors='coerce'), dtype='float32')
+
+
+def serie(x: pd.Series, y: pd.Series, liviano: bool, max_puntos: int = MAX_PUNTOS_SERIE, **kwargs) -> go.Scatter:
+    """
+    Traza de una serie temporal
+
+    En modo normal es un go.Scatter con los datos tal cual. En modo liviano usa WebGL,
+    decima la serie con LTTB, guarda los valores en float32 y las fechas sin hora, y dibuja
+    solo líneas.
+    """
+    if not liviano:
+        return go.Scatter(x=x, y=y, **kwargs)
+
+    x_values = pd.to_datetime(x).to_numpy()
+    y_values = float32(y)
+    valid = ~np.isnan(y_values)
+    x_values, y_values = x_values[valid], y_values[valid]
+
+    keep = lttb(x_values.astype('int64'), y_values, max_puntos)
+    kwargs['mode'] = 'lines'
+    kwargs.pop('marker', None)
+    fechas = pd.DatetimeIndex(x_values[keep]).strftime('%Y-%m-%d')
+    return go.Scattergl(x=list(fechas), y=y_values[keep], **kwargs)
+
+
+def heatmap(z: pd.DataFrame, liviano: bool, texttemplate: str, **kwargs) -> go.Heatmap:
+    """
+    Mapa de calor por categoría y período
+
+    Muestra el valor en cada celda solo si no hay demasiadas celdas; en modo liviano
+    guarda los valores en float32.
+    """
+    values = z.values
+    if liviano:
+        values = values.astype('float32')
+
+    if values.size <= MAX_CELDAS_TEXTO:
+        kwargs.update(text=values, texttemplate=texttemplate)
+
+    return go.Heatmap(z=values, x=z.columns, y=z.index, **kwargs)
@@ -0,0 +1,272 @@
+#!/usr/bin/env -S uv run
+# /// script
+# dependencies = []
+# ///
+"""
+Historial de versiones del dataset del monotributo
+Registro de solo agregado con los cambios de cada período (altas, reemplazos y bajas de
+registros, con fuente y fecha de descarga), más snapshots completos periódicos para
+reconstruir el dataset tal como estaba en cualquier fecha sin rehacer todo el historial
+"""
+
+import gzip
+import json
+import argparse
+from datetime import datetime, time, timezone
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple, Union
+
+import escritura
+
+HISTORIAL_DIR = Path("data/historial")
+DELTAS_FILE = "deltas.jsonl"
+INDICE_FILE = "indice.json"
+
+# Cada cuántas versiones se guarda un snapshot completo
+SNAPSHOT_CADA = 20
+
+
+def period_key(record: Dict[str, Any]) -> Tuple[str, str]:
+    return record['start_date'], record['end_date']
+
+
+def group_periods(data: Dict[str, Any]) -> Dict[Tuple[str, str], List[Dict[str, Any]]]:
+    """Agrupa los registros del dataset por período (en el orden del archivo)"""
+    periods: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for record in data['data']:
+        periods.setdefault(period_key(record), []).append(record)
+    return periods
+
+
+def calcular_cambios(anterior: Dict[str, Any], nuevo: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Compara dos versiones del dataset período por período
+    Retorna: un cambio por período distinto (alta, reemplazo o baja), con las claves
+    (categoría, tipo) agregadas, reemplazadas y eliminadas y los registros nuevos del período
+    """
+    before = group_periods(anterior)
+    after = group_periods(nuevo)
+
+    cambios = []
+    for key in sorted(set(before) | set(after)):
+        old = before.get(key, [])
+        new = after.get(key, [])
+        if old == new:
+            continue
+
+        old_by_key = {(r['categoria'], r['tipo_actividad']): r for r in old}
+        new_by_key = {(r['categoria'], r['tipo_actividad']): r for r in new}
+        cambios.append({
+            "periodo": list(key),
+            "accion": "alta" if not old else "baja" if not new else "reemplazo",
+            "agregados": [list(k) for k in new_by_key if k not in old_by_key],
+            "reemplazados": [list(k) for k in new_by_key if k in old_by_key and old_by_key[k] != new_by_key[k]],
+            "eliminados": [list(k) for k in old_by_key if k not in new_by_key],
+            "registros": new,
+        })
+    return cambios
+
+
+def aplicar_cambios(data: Dict[str, Any], delta: Dict[str, Any]):
+    """Aplica un delta sobre el dataset (igual que merge_records: reemplaza el período y ordena)"""
+    for cambio in delta['cambios']:
+        key = tuple(cambio['periodo'])
+        data['data'] = [r for r in data['data'] if period_key(r) != key]
+        data['data'].extend(cambio['registros'])
+    data['data'].sort(key=lambda r: r['start_date'])
+    data['metadata'] = delta['metadata']
+
+
+class Historial:
+    """Historial de versiones guardado en un directorio (deltas.jsonl + snapshots/)"""
+
+    def __init__(self, directorio: Path = HISTORIAL_DIR):
+        self.directorio = Path(directorio)
+        self.deltas_path = self.directorio / DELTAS_FILE
+        self.indice_path = self.directorio / INDICE_FILE
+
+    def indice(self) -> List[Dict[str, Any]]:
+        """Snapshots disponibles: versión, fecha, archivo y posición en deltas.jsonl"""
+        if not self.indice_path.exists():
+            return []
+        with open(self.indice_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_indice(self, indice: List[Dict[str, Any]]):
+        escritura.write_json_atomic(self.indice_path, indice)
+
+    def _write_snapshot(self, version: int, fecha: str, data: Dict[str, Any]):
+        """Guarda el dataset completo de una versión y lo agrega al índice"""
+        snapshots = self.directorio / "snapshots"
+        snapshots.mkdir(parents=True, exist_ok=True)
+        archivo = f"snapshots/v{version:06d}.json.gz"
+        content = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        escritura.write_bytes_atomic(self.directorio / archivo, gzip.compress(content, mtime=0))
+
+        offset = self.deltas_path.stat().st_size if self.deltas_path.exists() else 0
+        indice = [s for s in self.indice() if s['version'] != version]
+        indice.append({"version": version, "fecha": fecha, "archivo": archivo, "offset": offset})
+        self._save_indice(indice)
+
+    def _read_snapshot(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        with gzip.open(self.directorio / snapshot['archivo'], 'rt', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _deltas_desde(self, offset: int):
+        """Itera los deltas a partir de una posición de deltas.jsonl"""
+        if not self.deltas_path.exists():
+            return
+        with open(self.deltas_path, 'r', encoding='utf-8') as f:
+            f.seek(offset)
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def versiones(self) -> List[Dict[str, Any]]:
+        """Resumen de todas las versiones (sin los registros)"""
+        out = [
+            {"version": s['version'], "fecha": s['fecha'], "fuente": "snapshot", "periodos": []}
+            for s in self.indice()[:1]
+        ]
+        for delta in self._deltas_desde(0):
+            out.append({
+                "version": delta['version'],
+                "fecha": delta['fecha'],
+                "fuente": delta['fuente'],
+                "periodos": [(c['periodo'], c['accion']) for c in delta['cambios']],
+            })
+        return out
+
+    def ultima_version(self) -> Optional[int]:
+        indice = self.indice()
+        if not indice:
+            return None
+        last = max(indice, key=lambda s: s['version'])
+        version = last['version']
+        for delta in self._deltas_desde(last['offset']):
+            version = delta['version']
+        return version
+
+    def reconstruir(self, version: Optional[int] = None, fecha: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Reconstruye el dataset de una versión o tal como estaba en una fecha (ISO, UTC)
+
+        Parte del último snapshot anterior y aplica solo los deltas siguientes, así el
+        costo depende de los cambios desde ese snapshot y no del largo del historial.
+        """
+        candidates = [
+            s for s in self.indice()
+            if (version is None or s['version'] <= version) and (fecha is None or s['fecha'] <= fecha)
+        ]
+        if not candidates:
+            raise ValueError(f"No hay versiones del dataset anteriores a {fecha or version}")
+
+        snapshot = max(candidates, key=lambda s: s['version'])
+        data = self._read_snapshot(snapshot)
+        for delta in self._deltas_desde(snapshot['offset']):
+            if (version is not None and delta['version'] > version) or (fecha is not None and delta['fecha'] > fecha):
+                break
+            aplicar_cambios(data, delta)
+        return data
+
+    def registrar(self, anterior: Optional[Dict[str, Any]], nuevo: Dict[str, Any], fuente: str,
+                  fecha: Optional[datetime] = None) -> Optional[int]:
+        """
+        Registra el paso de `anterior` a `nuevo` como una nueva versión
+        Retorna: número de versión, o None si no hubo cambios
+
+        Si el historial está vacío, la primera versión es un snapshot de `anterior` (o de
+        `nuevo` si no hay dataset previo).
+        """
+        fecha_iso = (fecha or datetime.now(timezone.utc)).isoformat(timespec='seconds')
+        self.directorio.mkdir(parents=True, exist_ok=True)
+
+        last = self.ultima_version()
+        if last is None:
+            if anterior is None:
+                self._write_snapshot(0, fecha_iso, nuevo)
+                return 0
+            self._write_snapshot(0, fecha_iso, anterior)
+            last = 0
+
+        cambios = calcular_cambios(anterior or {"data": []}, nuevo)
+        if not cambios and (anterior or {}).get('metadata') == nuevo['metadata']:
+            return None
+
+        version = last + 1
+        delta = {"version": version, "fecha": fecha_iso, "fuente": fuente, "metadata": nuevo['metadata'], "cambios": cambios}
+        escritura.append_line(self.deltas_path, json.dumps(delta, ensure_ascii=False))
+
+        # Snapshot periódico, o si aplicar el delta no reproduce exactamente el dataset nuevo
+        # (por ejemplo, si se regeneró con otro orden de registros)
+        if version % SNAPSHOT_CADA == 0 or self.reconstruir(version=version) != nuevo:
+            self._write_snapshot(version, fecha_iso, nuevo)
+        return version
+
+
+def guardar_dataset(path: Union[str, Path], nuevo: Dict[str, Any], fuente: str,
+                    directorio: Path = HISTORIAL_DIR) -> Optional[int]:
+    """
+    Registra en el historial el paso del dataset de `path` a `nuevo` y recién entonces lo escribe
+    Retorna: número de versión, o None si no hubo cambios (el archivo no se reescribe)
+
+    Todos los scripts que escriben el dataset pasan por acá, así ninguna versión queda fuera
+    del historial. El delta ya está en disco cuando se reemplaza el archivo.
+    """
+    anterior = None
+    if Path(path).exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            anterior = json.load(f)
+
+    version = Historial(directorio).registrar(anterior, nuevo, fuente)
+    if version is not None:
+        escritura.write_json_atomic(path, nuevo)
+    return version
+
+
+def parse_fecha(texto: str) -> str:
+    """Convierte una fecha u hora ISO a UTC; una fecha sola incluye todo ese día"""
+    value = datetime.fromisoformat(texto)
+    if len(texto) == 10:
+        value = datetime.combine(value.date(), time.max.replace(microsecond=0))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec='seconds')
+
+
+def dataset_al(fecha: str, directorio: Path = HISTORIAL_DIR) -> Dict[str, Any]:
+    """Dataset tal como estaba en una fecha (YYYY-MM-DD o fecha y hora ISO)"""
+    return Historial(directorio).reconstruir(fecha=parse_fecha(fecha))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Historial de versiones del dataset del monotributo')
+    parser.add_argument('--directorio', default=str(HISTORIAL_DIR), help='Directorio del historial')
+    subparsers = parser.add_subparsers(dest='accion', required=True)
+    subparsers.add_parser('versiones', help='Listar las versiones registradas')
+    al = subparsers.add_parser('al', help='Reconstruir el dataset tal como estaba en una fecha')
+    al.add_argument('fecha', help='Fecha (YYYY-MM-DD) o fecha y hora ISO')
+    al.add_argument('--salida', default=None, help='Archivo JSON de salida (default: stdout)')
+    args = parser.parse_args()
+
+    historial = Historial(Path(args.directorio))
+
+    if args.accion == 'versiones':
+        print("=" * 80)
+        print("HISTORIAL DEL DATASET")
+        print("=" * 80)
+        for version in historial.versiones():
+            periodos = ", ".join(f"{p[0]}→{p[1]} ({accion})" for p, accion in version['periodos'])
+            print(f"v{version['version']:<5} {version['fecha']}  {version['fuente']}  {periodos}")
+        return
+
+    data = dataset_al(args.fecha, Path(args.directorio))
+    if args.salida:
+        escritura.write_json_atomic(args.salida, data)
+        print(f"✓ Dataset al {args.fecha} guardado en: {args.salida} ({len(data['data'])} registros)")
+    else:
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
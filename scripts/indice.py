@@ -0,0 +1,170 @@
+"""
+Página índice (index.html) con enlaces a todos los gráficos generados
+La usan analizar_monotributo.py (enlaces a graficos/) y publicar.py (enlaces a los
+archivos publicados con hash en el nombre)
+"""
+
+import os
+import glob
+from collections import defaultdict
+from datetime import datetime as dt
+from typing import Dict, Any, Callable, Optional
+
+from jinja2 import Template
+
+import miniaturas
+
+PLANTILLA = 'index.jinja'
+
+FILE_DESCRIPTIONS = {
+    'nominal': 'Evolución en valores nominales',
+    'real': 'Evolución ajustada por inflación (valores reales)',
+    'incremento': 'Comparación de incrementos: nominal vs real',
+    'heatmap': 'Mapa de calor por período y categoría'
+}
+
+COMPONENTE_LABELS = {
+    'total': 'Total Mensual',
+    'impuesto_integrado': 'Impuesto Integrado',
+    'aporte_sipa': 'Aporte Jubilatorio (SIPA)',
+    'aporte_obra_social': 'Aporte Obra Social',
+    'ingresos_brutos': 'Ingresos Brutos'
+}
+
+COMPONENTES_ORDENADOS = ['total', 'ingresos_brutos', 'impuesto_integrado', 'aporte_sipa', 'aporte_obra_social']
+
+
+def parse_filename_to_title(basename):
+    """Parsea el nombre de archivo y genera un título legible"""
+    # Formato: monotributo_{tipo}_{componente}_{grafico}.html
+    parts = basename.replace('monotributo_', '').replace('.html', '').split('_')
+    title_parts = []
+
+    # Tipo de actividad (servicios/ventas)
+    if 'servicios' in parts:
+        title_parts.append('Servicios')
+        parts.remove('servicios')
+    elif 'ventas' in parts:
+        title_parts.append('Ventas')
+        parts.remove('ventas')
+
+    # Identificar el componente completo
+    if 'impuesto' in parts and 'integrado' in parts:
+        title_parts.append('Impuesto Integrado')
+        parts = [p for p in parts if p not in ['impuesto', 'integrado']]
+    elif 'aporte' in parts and 'sipa' in parts:
+        title_parts.append('Aporte SIPA')
+        parts = [p for p in parts if p not in ['aporte', 'sipa']]
+    elif 'obra' in parts and 'social' in parts:
+        title_parts.append('Aporte Obra Social')
+        parts = [p for p in parts if p not in ['aporte', 'obra', 'social']]
+    elif 'total' in parts:
+        title_parts.append('Total')
+        parts.remove('total')
+
+    # Tipo de gráfico
+    grafico_map = {
+        'nominal': 'Nominal',
+        'real': 'Real',
+        'incremento': 'Incremento',
+        'heatmap': 'Mapa de Calor'
+    }
+
+    for idx, part in enumerate(parts):
+        if part in grafico_map:
+            title_parts.append(grafico_map[part])
+            # Deflactor distinto del IPC: monotributo_{tipo}_{componente}_{grafico}_{deflactor}.html
+            if parts[idx + 1:]:
+                title_parts.append('_'.join(parts[idx + 1:]).upper())
+            break
+
+    return ' - '.join(title_parts) if title_parts else basename
+
+
+def parse_componente(basename: str) -> Optional[str]:
+    """Componente del monotributo a partir del nombre de archivo"""
+    # Formato: monotributo_{tipo}_{componente}_{grafico}.html
+    parts = basename.replace('monotributo_', '').replace('.html', '').split('_')
+
+    if 'impuesto' in parts and 'integrado' in parts:
+        return 'impuesto_integrado'
+    elif 'aporte' in parts and 'sipa' in parts:
+        return 'aporte_sipa'
+    elif 'obra' in parts and 'social' in parts:
+        return 'aporte_obra_social'
+    elif 'ingresos' in parts and 'brutos' in parts:
+        return 'ingresos_brutos'
+    elif 'total' in parts:
+        return 'total'
+    return None
+
+
+def contexto(graficos_dir: str = 'graficos', data_json: str = 'data/monotributo_historico.json') -> Dict[str, Any]:
+    """Variables de la plantilla: fecha de los datos y gráficos agrupados por componente"""
+    # Obtener fecha de última actualización de los datos
+    try:
+        datos_timestamp = os.path.getmtime(data_json)
+        fecha_datos = dt.fromtimestamp(datos_timestamp).strftime('%d/%m/%Y %H:%M:%S')
+    except OSError:
+        fecha_datos = 'No disponible'
+
+    # Obtener archivos HTML y preparar datos
+    html_files = sorted(glob.glob(f'{graficos_dir}/monotributo_*.html'))
+    thumbs = miniaturas.disponibles(graficos_dir)
+
+    graficos = []
+    for html_file in html_files:
+        basename = os.path.basename(html_file)
+
+        # Determinar descripción
+        desc = 'Gráfico del monotributo'
+        for key, value in FILE_DESCRIPTIONS.items():
+            if key in basename:
+                desc = value
+                break
+
+        graficos.append({
+            'filename': f'{graficos_dir}/{basename}',  # Ruta relativa con carpeta
+            'title': parse_filename_to_title(basename),
+            'description': desc,
+            'componente': parse_componente(basename),
+            'miniatura': thumbs.get(basename)
+        })
+
+    # Agrupar gráficos por componente
+    graficos_por_componente = defaultdict(list)
+    for grafico in graficos:
+        comp = grafico['componente']
+        if comp:
+            graficos_por_componente[comp].append(grafico)
+
+    graficos_agrupados = [
+        {
+            'componente': comp,
+            'label': COMPONENTE_LABELS.get(comp, comp),
+            'graficos': graficos_por_componente[comp]
+        }
+        for comp in COMPONENTES_ORDENADOS
+        if comp in graficos_por_componente
+    ]
+
+    return {'fecha_datos': fecha_datos, 'graficos_agrupados': graficos_agrupados}
+
+
+def render(ctx: Dict[str, Any], asset: Optional[Callable[[str], str]] = None, plantilla: str = PLANTILLA) -> str:
+    """
+    Renderiza la plantilla del índice
+
+    `asset` traduce la ruta de cada archivo enlazado a la ruta publicada (por defecto la
+    misma ruta).
+    """
+    with open(plantilla, 'r', encoding='utf-8') as f:
+        template = Template(f.read())
+    return template.render(asset=asset or (lambda path: path), **ctx)
+
+
+def generar(graficos_dir: str = 'graficos', salida: str = 'index.html'):
+    """Genera index.html con todos los gráficos disponibles"""
+    html_output = render(contexto(graficos_dir))
+    with open(salida, 'w', encoding='utf-8') as f:
+        f.write(html_output)
@@ -0,0 +1,219 @@
+#!/usr/bin/env -S uv run
+# /// script
+# dependencies = [
+#   "plotly",
+#   "kaleido",
+#   "jinja2",
+# ]
+# ///
+"""
+Miniaturas estáticas de los gráficos para la página índice
+Se exportan todas juntas con un único proceso de kaleido (plotly.io.write_images) y se
+cachean por el hash del contenido de cada figura: un gráfico que no cambió no se vuelve a
+renderizar. kaleido es opcional: sin él (o sin Chrome) el índice queda solo con enlaces
+
+Cuando se generan los gráficos en varias corridas de analizar_monotributo.py (como en la
+actualización automática), `--diferir-miniaturas` deja las figuras pendientes en
+.cache/miniaturas/ y este script las renderiza todas en una sola pasada
+"""
+
+import json
+import shutil
+import hashlib
+import argparse
+import tempfile
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+import escritura
+
+# Carpeta de las miniaturas dentro de la carpeta de gráficos, y caché de hashes
+MINIATURAS_DIR = 'miniaturas'
+CACHE_FILE = 'miniaturas.json'
+
+# Figuras que esperan ser renderizadas (fuera de graficos/, no se publican)
+PENDIENTES_DIR = Path('.cache/miniaturas')
+
+FORMATOS = ['webp', 'png']
+FORMATO = 'webp'
+ANCHO = 480
+ALTO = 300
+
+# Cambiar el estilo de las miniaturas requiere subir la versión (invalida la caché)
+VERSION_ESTILO = 1
+
+
+def miniatura(fig: Any) -> Any:
+    """Copia de la figura con estilo de miniatura: sin título, leyenda, ejes rotulados ni textos"""
+    # plotly se importa acá: indice.py (y publicar.py) solo leen la caché
+    import plotly.graph_objects as go
+
+    thumb = go.Figure(fig)
+    thumb.update_layout(
+        title=None,
+        showlegend=False,
+        xaxis_title=None,
+        yaxis_title=None,
+        height=None,
+        margin=dict(l=10, r=10, t=10, b=10)
+    )
+    thumb.update_traces(text=None, texttemplate=None, selector=dict(type='bar'))
+    thumb.update_traces(text=None, texttemplate=None, showscale=False, selector=dict(type='heatmap'))
+    return thumb
+
+
+def figura_hash(thumb: Any, formato: str) -> str:
+    """Hash del contenido de la miniatura y de los parámetros de exportación"""
+    clave = f"{VERSION_ESTILO}|{formato}|{ANCHO}x{ALTO}|{thumb.to_json()}"
+    return hashlib.sha256(clave.encode('utf-8')).hexdigest()
+
+
+def leer_cache(graficos_dir: str = 'graficos') -> Dict[str, Dict[str, str]]:
+    """
+    Miniaturas ya generadas
+    Retorna: {nombre del HTML: {"archivo": ruta relativa a graficos_dir, "sha256": hash}}
+    """
+    path = Path(graficos_dir) / MINIATURAS_DIR / CACHE_FILE
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def disponibles(graficos_dir: str = 'graficos') -> Dict[str, str]:
+    """Ruta de la miniatura (con la carpeta de gráficos) de cada HTML que tiene una"""
+    return {
+        html: f"{graficos_dir}/{entry['archivo']}"
+        for html, entry in leer_cache(graficos_dir).items()
+        if (Path(graficos_dir) / entry['archivo']).exists()
+    }
+
+
+def pendientes(figuras: Dict[str, Any], graficos_dir: str = 'graficos',
+               formato: str = FORMATO) -> List[Tuple[str, Any, Dict[str, str]]]:
+    """
+    Miniaturas que hay que renderizar de las figuras ({ruta del HTML: figura})
+    Retorna: lista de (nombre del HTML, figura de la miniatura, entrada de la caché)
+    """
+    cache = leer_cache(graficos_dir)
+    result = []
+    for html, fig in figuras.items():
+        nombre = Path(html).name
+        thumb = miniatura(fig)
+        entry = {'archivo': f"{MINIATURAS_DIR}/{Path(html).stem}.{formato}", 'sha256': figura_hash(thumb, formato)}
+        if cache.get(nombre) == entry and (Path(graficos_dir) / entry['archivo']).exists():
+            continue
+        result.append((nombre, thumb, entry))
+    return result
+
+
+def renderizar(items: List[Tuple[str, Any, Dict[str, str]]], graficos_dir: str = 'graficos') -> bool:
+    """
+    Exporta las miniaturas en un único llamado (un solo proceso de Chrome) y actualiza la caché
+    Retorna: False si kaleido no está disponible
+
+    Se renderiza en un directorio temporal: si falla, graficos/ queda sin cambios.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        destinos = [Path(tmp) / Path(entry['archivo']).name for _, _, entry in items]
+        try:
+            import plotly.io as pio
+            pio.write_images(
+                [thumb for _, thumb, _ in items],
+                destinos,
+                format=[Path(entry['archivo']).suffix[1:] for _, _, entry in items],
+                width=ANCHO,
+                height=ALTO
+            )
+        except Exception as e:
+            # kaleido no instalado, sin Chrome, etc.: las miniaturas son opcionales
+            motivo = str(e).strip().splitlines()[0] if str(e).strip() else type(e).__name__
+            print(f"⚠ No se generaron miniaturas: {motivo}")
+            return False
+
+        (Path(graficos_dir) / MINIATURAS_DIR).mkdir(parents=True, exist_ok=True)
+        for destino, (_, _, entry) in zip(destinos, items):
+            shutil.move(destino, Path(graficos_dir) / entry['archivo'])
+
+    cache = leer_cache(graficos_dir)
+    for nombre, _, entry in items:
+        cache[nombre] = entry
+    escritura.write_json_atomic(Path(graficos_dir) / MINIATURAS_DIR / CACHE_FILE, dict(sorted(cache.items())))
+    return True
+
+
+def generar(figuras: Dict[str, Any], graficos_dir: str = 'graficos',
+            formato: str = FORMATO) -> Optional[int]:
+    """
+    Genera las miniaturas de las figuras ({ruta del HTML: figura}) que cambiaron
+    Retorna: cantidad de miniaturas renderizadas, o None si kaleido no está disponible
+    """
+    items = pendientes(figuras, graficos_dir, formato)
+    if not items:
+        return 0
+    return len(items) if renderizar(items, graficos_dir) else None
+
+
+def diferir(figuras: Dict[str, Any], graficos_dir: str = 'graficos', formato: str = FORMATO) -> int:
+    """
+    Guarda en PENDIENTES_DIR las figuras cuyas miniaturas cambiaron, para renderizarlas
+    después junto con las de otras corridas
+    Retorna: cantidad de figuras guardadas
+    """
+    items = pendientes(figuras, graficos_dir, formato)
+    if items:
+        PENDIENTES_DIR.mkdir(parents=True, exist_ok=True)
+    for nombre, thumb, entry in items:
+        spec = {'html': nombre, 'entry': entry, 'figura': json.loads(thumb.to_json())}
+        escritura.write_json_atomic(PENDIENTES_DIR / f"{Path(nombre).stem}.json", spec)
+    return len(items)
+
+
+def renderizar_diferidas(graficos_dir: str = 'graficos') -> Optional[int]:
+    """
+    Renderiza en una sola pasada todas las figuras guardadas por diferir()
+    Retorna: cantidad de miniaturas renderizadas, o None si kaleido no está disponible
+    """
+    paths = sorted(PENDIENTES_DIR.glob('*.json'))
+    if not paths:
+        return 0
+
+    import plotly.graph_objects as go
+
+    items = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+        items.append((spec['html'], go.Figure(spec['figura']), spec['entry']))
+
+    if not renderizar(items, graficos_dir):
+        return None
+    for path in paths:
+        path.unlink()
+    return len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Renderiza las miniaturas pendientes de los gráficos en una sola pasada')
+    parser.add_argument('--graficos', default='graficos', help='Directorio con los gráficos generados')
+    args = parser.parse_args()
+
+    # Se importa acá porque indice.py importa este módulo
+    import indice
+
+    print("=" * 80)
+    print("MINIATURAS DE LOS GRÁFICOS")
+    print("=" * 80)
+
+    renderizadas = renderizar_diferidas(args.graficos)
+    if renderizadas is None:
+        print(f"  Las figuras quedan pendientes en {PENDIENTES_DIR}/")
+    else:
+        print(f"✓ {renderizadas} miniatura(s) renderizada(s) en {args.graficos}/{MINIATURAS_DIR}/")
+
+    indice.generar(args.graficos)
+    print("✓ Generado index.html con todos los gráficos disponibles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env -S uv run
+# /// script
+# dependencies = [
+#   "numpy",
+#   "pandas",
+# ]
+# ///
+"""
+Script para proyectar los valores futuros de las categorías del monotributo
+Simula miles de trayectorias de inflación (Monte Carlo vectorizado con NumPy) y aplica las
+actualizaciones semestrales por IPC sobre el último período del dataset
+"""
+
+import json
+import argparse
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from datos import cargar_dataframe, cargar_ipc
+
+COMPONENTES = ["total", "ingresos_brutos", "impuesto_integrado", "aporte_sipa", "aporte_obra_social"]
+PERCENTILES = [5, 25, 50, 75, 95]
+
+# Los montos se actualizan en febrero y agosto por el IPC acumulado del semestre que termina
+# dos meses antes (agosto: enero–junio; febrero: julio–diciembre del año anterior)
+MESES_ACTUALIZACION = (2, 8)
+MESES_SEMESTRE = 6
+MESES_REZAGO = 1
+
+# Meses de IPC usados para calibrar el modelo de inflación
+VENTANA_CALIBRACION = 24
+
+
+def calibrar(log_factores: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Estima un AR(1) sobre el logaritmo del factor mensual de inflación
+    Retorna: (media, autocorrelación, desvío de las innovaciones)
+    """
+    mu = float(log_factores.mean())
+    centered = log_factores - mu
+    denom = float((centered[:-1] ** 2).sum())
+    phi = float((centered[1:] * centered[:-1]).sum() / denom) if denom > 0 else 0.0
+    phi = min(max(phi, 0.0), 0.99)
+    residuals = centered[1:] - phi * centered[:-1]
+    sigma = float(residuals.std()) if len(residuals) > 1 else 0.0
+    return mu, phi, sigma
+
+
+def simular_inflacion(ultimo: float, mu: float, phi: float, sigma: float, escenarios: int,
+                      meses: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Simula trayectorias del log del factor mensual de inflación
+    Retorna: array (escenario × mes)
+
+    Todos los escenarios avanzan juntos: el único bucle es sobre los meses.
+    """
+    shocks = rng.standard_normal((escenarios, meses)) * sigma
+    paths = np.empty((escenarios, meses))
+    previous = np.full(escenarios, ultimo - mu)
+    for month in range(meses):
+        previous = phi * previous + shocks[:, month]
+        paths[:, month] = previous
+    paths += mu
+    return paths
+
+
+def multiplicadores(log_factores: np.ndarray, meses: List[pd.Period], inicio: int) -> np.ndarray:
+    """
+    Multiplicador acumulado de los montos por las actualizaciones semestrales
+
+    `log_factores` es (escenario × mes) sobre el calendario `meses`, incluidos los meses
+    previos al período base que entran en la primera ventana de actualización; `inicio` es
+    el índice del mes base. Retorna: array (escenario × mes) desde el mes base (base = 1).
+    """
+    cumulative = np.concatenate([np.zeros((log_factores.shape[0], 1)), np.cumsum(log_factores, axis=1)], axis=1)
+    updates = np.zeros((log_factores.shape[0], len(meses) - inicio))
+    for idx in range(inicio + 1, len(meses)):
+        if meses[idx].month in MESES_ACTUALIZACION:
+            # IPC acumulado de los meses m-7..m-2 (el semestre cerrado antes del mes anterior)
+            fin = idx - MESES_REZAGO
+            updates[:, idx - inicio] = cumulative[:, fin] - cumulative[:, fin - MESES_SEMESTRE]
+    return np.exp(np.cumsum(updates, axis=1))
+
+
+def valores_base(df: pd.DataFrame, tipo: str) -> Tuple[pd.Timestamp, List[str], Dict[str, np.ndarray]]:
+    """
+    Montos del último período del dataset para un tipo de actividad
+    Retorna: (inicio del período, categorías, {componente: array por categoría})
+    """
+    df_tipo = df[df['tipo_actividad'] == tipo]
+    inicio = df_tipo['start_date'].max()
+    ultimo = df_tipo[df_tipo['start_date'] == inicio].sort_values('categoria')
+    categorias = [str(c) for c in ultimo['categoria']]
+    base = {c: ultimo[c].astype('float64').to_numpy() for c in COMPONENTES}
+    return inicio, categorias, base
+
+
+def proyectar(df: pd.DataFrame, df_ipc: pd.DataFrame, tipo: str = 'servicios', meses: int = 24,
+              escenarios: int = 10000, inflacion_mensual: Optional[float] = None,
+              percentiles: List[int] = PERCENTILES, semilla: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Proyecta los montos del último período bajo escenarios de inflación
+
+    El IPC observado se usa tal cual; a partir del último mes publicado se simulan
+    `escenarios` trayectorias por `meses` meses con un AR(1) calibrado sobre los últimos
+    VENTANA_CALIBRACION meses (o centrado en `inflacion_mensual` %, si se indica).
+
+    Retorna un dict con los meses (YYYY-MM), las categorías, los percentiles y las bandas
+    nominales y reales (en pesos del mes base) de cada componente, como arrays
+    (percentil × mes × categoría).
+    """
+    inicio, categorias, base = valores_base(df, tipo)
+    mes_base = inicio.to_period('M')
+
+    ipc = df_ipc.assign(mes=df_ipc['fecha'].dt.to_period('M')).set_index('mes')
+    log_observado = np.log(ipc['factor_mensual'].to_numpy())
+
+    mu, phi, sigma = calibrar(log_observado[-VENTANA_CALIBRACION:])
+    if inflacion_mensual is not None:
+        mu = float(np.log1p(inflacion_mensual / 100))
+
+    # Calendario: desde la primera ventana de actualización hasta el horizonte simulado
+    desde = mes_base - MESES_SEMESTRE - MESES_REZAGO
+    ultimo_observado = ipc.index.max()
+    calendario = list(pd.period_range(desde, ultimo_observado + meses, freq='M'))
+    observados = ipc['factor_mensual'].reindex(pd.PeriodIndex(calendario[:len(calendario) - meses], freq='M'))
+    if observados.isna().any():
+        raise ValueError(f"Faltan datos de IPC entre {desde} y {ultimo_observado}")
+
+    rng = np.random.default_rng(semilla)
+    simulados = simular_inflacion(log_observado[-1], mu, phi, sigma, escenarios, meses, rng)
+    log_factores = np.concatenate([np.broadcast_to(np.log(observados.to_numpy()), (escenarios, len(observados))), simulados], axis=1)
+
+    inicio_idx = calendario.index(mes_base)
+    nominal = multiplicadores(log_factores, calendario, inicio_idx)
+    precios = np.exp(np.cumsum(log_factores[:, inicio_idx + 1:], axis=1))
+    real = nominal[:, 1:] / precios
+
+    # Todas las categorías y componentes se actualizan con el mismo multiplicador, así que el
+    # percentil de (escenario × mes × categoría) es el percentil del multiplicador por el
+    # monto base: se calcula sobre (escenario × mes) y se expande por categoría
+    bandas_nominal = np.percentile(nominal[:, 1:], percentiles, axis=0)
+    bandas_real = np.percentile(real, percentiles, axis=0)
+
+    return {
+        "tipo": tipo,
+        "periodo_base": str(mes_base),
+        "ultimo_ipc": str(ultimo_observado),
+        "modelo": {"media_mensual_pct": float(np.expm1(mu) * 100), "autocorrelacion": phi, "desvio": sigma},
+        "escenarios": escenarios,
+        "meses": [str(m) for m in calendario[inicio_idx + 1:]],
+        "categorias": categorias,
+        "percentiles": list(percentiles),
+        "nominal": {c: bandas_nominal[:, :, None] * base[c][None, None, :] for c in COMPONENTES},
+        "real": {c: bandas_real[:, :, None] * base[c][None, None, :] for c in COMPONENTES},
+    }
+
+
+def to_json(proyeccion: Dict[str, Any]) -> Dict[str, Any]:
+    """Convierte las bandas a listas (null donde el monto base no existe)"""
+    def listas(bandas: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        return {
+            c: [[[None if np.isnan(v) else round(float(v)) for v in mes] for mes in banda] for banda in array]
+            for c, array in bandas.items()
+        }
+
+    out = dict(proyeccion)
+    out["nominal"] = listas(proyeccion["nominal"])
+    out["real"] = listas(proyeccion["real"])
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Proyecta los montos del monotributo bajo escenarios de inflación')
+    parser.add_argument('--tipo', choices=['servicios', 'ventas'], default='servicios', help='Tipo de actividad')
+    parser.add_argument('--componente', choices=COMPONENTES, default='total', help='Componente a mostrar')
+    parser.add_argument('--meses', type=int, default=24, help='Meses a simular después del último IPC publicado')
+    parser.add_argument('--escenarios', type=int, default=10000, help='Cantidad de trayectorias de inflación')
+    parser.add_argument('--inflacion-mensual', type=float, default=None,
+                        help='Inflación mensual media (%%) del escenario; por defecto se calibra con el IPC reciente')
+    parser.add_argument('--semilla', type=int, default=None, help='Semilla del generador aleatorio')
+    parser.add_argument('--salida', default=None, help='Guardar todas las bandas en este archivo JSON')
+    args = parser.parse_args()
+
+    df = cargar_dataframe()
+    df_ipc = cargar_ipc()
+    proyeccion = proyectar(df, df_ipc, tipo=args.tipo, meses=args.meses, escenarios=args.escenarios,
+                           inflacion_mensual=args.inflacion_mensual, semilla=args.semilla)
+
+    modelo = proyeccion["modelo"]
+    print('=' * 80)
+    print('PROYECCIÓN DEL MONOTRIBUTO')
+    print('=' * 80)
+    print(f"Tipo de actividad: {args.tipo}")
+    print(f"Período base: {proyeccion['periodo_base']} (último IPC: {proyeccion['ultimo_ipc']})")
+    print(f"Escenarios: {args.escenarios} | Inflación mensual media: {modelo['media_mensual_pct']:.2f}% "
+          f"(autocorrelación {modelo['autocorrelacion']:.2f})")
+
+    pct = proyeccion["percentiles"]
+    for etiqueta, clave in [('NOMINAL', 'nominal'), (f"REAL (pesos de {proyeccion['periodo_base']})", 'real')]:
+        bandas = proyeccion[clave][args.componente][:, -1, :]
+        tabla = pd.DataFrame(bandas.T, index=proyeccion["categorias"], columns=[f'p{p}' for p in pct]).round(0)
+        print('\n' + '=' * 80)
+        print(f"{args.componente} en {proyeccion['meses'][-1]} - {etiqueta}")
+        print('=' * 80)
+        print(tabla.to_string())
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(to_json(proyeccion), f, ensure_ascii=False, indent=2)
+        print(f"\n✓ Bandas guardadas en: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env -S uv run
+# /// script
+# dependencies = [
+#   "jinja2",
+#   "brotli",
+# ]
+# ///
+"""
+Script para preparar el sitio estático publicado (índice, gráficos y datos)
+Minifica HTML y JSON, separa plotly.js en un único archivo compartido, nombra cada archivo
+con el hash de su contenido y genera versiones precomprimidas (.gz y .br) más un manifiesto,
+así el hosting puede servir los bytes comprimidos con caché de larga duración
+"""
+
+import re
+import io
+import json
+import gzip
+import glob
+import hashlib
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import brotli
+
+import indice
+import escritura
+
+SALIDA_DIR = Path("sitio")
+GRAFICOS_DIR = "graficos"
+DATOS = ["data/monotributo_historico.json", "data/ipc.json"]
+MANIFIESTO = "manifest.json"
+HEADERS = "_headers"
+
+# Caracteres del hash de contenido en el nombre de los archivos
+LARGO_HASH = 10
+
+# Los archivos con hash no cambian nunca; los de nombre fijo se revalidan en cada visita
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "no-cache"
+
+TIPOS = {
+    ".html": "text/html; charset=utf-8",
+    ".json": "application/json",
+    ".js": "text/javascript; charset=utf-8",
+    ".webp": "image/webp",
+    ".png": "image/png",
+}
+
+# Bloques cuyo contenido no se toca al minificar
+_BLOQUE_CRUDO = re.compile(r'(<(script|pre|textarea)\b[^>]*>.*?</\2\s*>)', re.DOTALL | re.IGNORECASE)
+_COMENTARIO = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+_ESPACIOS_CON_SALTO = re.compile(r'\s*\n\s*')
+_ESPACIOS = re.compile(r'[ \t]{2,}')
+
+# plotly.js embebido por write_html y el id aleatorio (uuid4) del div de cada figura
+_PLOTLY_JS = re.compile(r'<script>(/\*\*\s*\n\* plotly\.js v([\w.\-]+).*?)</script>', re.DOTALL)
+_ID_FIGURA = re.compile(r'<div id="([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})" class="plotly-graph-div"')
+
+
+def minify_html(html: str) -> str:
+    """
+    Minificación conservadora: quita comentarios y colapsa espacios fuera de los bloques
+    <script>, <pre> y <textarea>. Un salto de línea se conserva como separador, así el
+    espaciado visible del documento no cambia.
+    """
+    partes = _BLOQUE_CRUDO.split(html)
+    out = []
+    # split con dos grupos: [texto, bloque, nombre de la etiqueta, texto, ...]
+    for idx in range(0, len(partes), 3):
+        texto = _COMENTARIO.sub('', partes[idx])
+        texto = _ESPACIOS_CON_SALTO.sub('\n', texto)
+        out.append(_ESPACIOS.sub(' ', texto))
+        if idx + 1 < len(partes):
+            out.append(partes[idx + 1])
+    return ''.join(out).strip() + '\n'
+
+
+def minify_json(path: str) -> bytes:
+    """JSON sin espacios (mismo contenido y orden de claves)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:LARGO_HASH]
+
+
+def hashed_name(ruta: str, content: bytes) -> str:
+    """graficos/x.html → graficos/x.<hash>.html"""
+    path = Path(ruta)
+    return str(path.with_name(f"{path.stem}.{content_hash(content)}{path.suffix}"))
+
+
+def gzip_bytes(content: bytes) -> bytes:
+    """gzip determinístico (sin nombre de archivo ni fecha en el encabezado)"""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(filename='', mode='wb', fileobj=buffer, compresslevel=9, mtime=0) as f:
+        f.write(content)
+    return buffer.getvalue()
+
+
+class Sitio:
+    """Archivos del sitio publicado, con sus versiones comprimidas y el manifiesto"""
+
+    def __init__(self, salida: Path):
+        self.salida = salida
+        self.manifiesto: Dict[str, Dict[str, Any]] = {}
+        self.escritos: set = set()
+        self.reutilizados = 0
+
+    def _write(self, ruta: str, content: bytes) -> bool:
+        """Escribe un archivo si no existe con el mismo contenido. Retorna: True si se escribió"""
+        self.escritos.add(ruta)
+        path = self.salida / ruta
+        if path.exists() and path.read_bytes() == content:
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        escritura.write_bytes_atomic(path, content)
+        return True
+
+    def _publicar(self, ruta: str, content: bytes, comprimir: bool = True) -> bool:
+        """
+        Escribe un archivo con su .gz y .br (si `comprimir`)
+        Retorna: True si ya estaba publicado con el mismo contenido (no se vuelve a comprimir)
+        """
+        cambiado = self._write(ruta, content)
+        siblings = [f"{ruta}.gz", f"{ruta}.br"] if comprimir else []
+        if not cambiado and all((self.salida / s).exists() for s in siblings):
+            self.escritos.update(siblings)
+            return True
+        if comprimir:
+            self._write(siblings[0], gzip_bytes(content))
+            self._write(siblings[1], brotli.compress(content, quality=11))
+        return False
+
+    def agregar(self, logico: str, content: bytes, con_hash: bool = True, alias: bool = False,
+                comprimir: bool = True) -> str:
+        """
+        Publica un archivo y lo registra en el manifiesto
+        Retorna: la ruta publicada (con hash en el nombre si `con_hash`)
+
+        Con `alias` además se publica una copia con el nombre original (para enlaces externos).
+        Los formatos ya comprimidos (imágenes) se publican con `comprimir=False`.
+        """
+        ruta = hashed_name(logico, content) if con_hash else logico
+        if self._publicar(ruta, content, comprimir):
+            self.reutilizados += 1
+        entry = {
+            "archivo": ruta,
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "bytes": len(content),
+            "tipo": TIPOS.get(Path(logico).suffix, "application/octet-stream"),
+            "cache": CACHE_INMUTABLE if con_hash else CACHE_REVALIDAR,
+        }
+        if comprimir:
+            entry["gzip"] = (self.salida / f"{ruta}.gz").stat().st_size
+            entry["brotli"] = (self.salida / f"{ruta}.br").stat().st_size
+        if alias:
+            self._publicar(logico, content, comprimir)
+            entry["alias"] = logico
+        self.manifiesto[logico] = entry
+        return ruta
+
+    def headers(self) -> str:
+        """Reglas de Cache-Control por archivo (formato _headers de Netlify/Cloudflare Pages)"""
+        reglas = {}
+        for entry in self.manifiesto.values():
+            reglas[entry['archivo']] = entry['cache']
+            if 'alias' in entry:
+                reglas[entry['alias']] = CACHE_REVALIDAR
+        lines = []
+        for ruta, cache in sorted(reglas.items()):
+            lines.append(f"/{ruta}")
+            lines.append(f"  Cache-Control: {cache}")
+        return '\n'.join(lines) + '\n'
+
+    def limpiar(self) -> List[str]:
+        """Borra los archivos de publicaciones anteriores que ya no se usan"""
+        borrados = []
+        for path in sorted(self.salida.rglob('*')):
+            ruta = path.relative_to(self.salida).as_posix()
+            if path.is_file() and ruta not in self.escritos:
+                path.unlink()
+                borrados.append(ruta)
+        return borrados
+
+
+def separar_plotly(html: str, sitio: Sitio, bundles: Dict[str, str]) -> str:
+    """
+    Reemplaza plotly.js embebido por un <script src> al archivo compartido (con hash)
+    y el id aleatorio de la figura por uno fijo, así el HTML solo cambia si cambia el gráfico
+    """
+    match = _PLOTLY_JS.search(html)
+    if match:
+        version = match.group(2)
+        if version not in bundles:
+            ruta = sitio.agregar(f"{GRAFICOS_DIR}/plotly-{version}.min.js", match.group(1).encode('utf-8'))
+            bundles[version] = Path(ruta).name
+        html = html[:match.start()] + f'<script src="{bundles[version]}"></script>' + html[match.end():]
+
+    figura = _ID_FIGURA.search(html)
+    if figura:
+        html = html.replace(figura.group(1), 'grafico')
+    return html
+
+
+def publicar(salida: Path = SALIDA_DIR, graficos_dir: str = GRAFICOS_DIR, datos: Optional[List[str]] = None,
+             plantilla: str = indice.PLANTILLA) -> Sitio:
+    """Genera el sitio en `salida`: gráficos y datos con hash, index.html y manifest.json"""
+    sitio = Sitio(Path(salida))
+    bundles: Dict[str, str] = {}
+
+    for html_file in sorted(glob.glob(f'{graficos_dir}/monotributo_*.html')):
+        with open(html_file, 'r', encoding='utf-8') as f:
+            html = f.read()
+        html = minify_html(separar_plotly(html, sitio, bundles))
+        sitio.agregar(f"{GRAFICOS_DIR}/{Path(html_file).name}", html.encode('utf-8'))
+
+    for path in datos if datos is not None else DATOS:
+        if Path(path).exists():
+            # También con el nombre fijo, para quien descarga el dataset directamente
+            sitio.agregar(path, minify_json(path), alias=True)
+
+    # El índice enlaza a los archivos con hash; su propio nombre es fijo
+    ctx = indice.contexto(graficos_dir)
+    for grupo in ctx['graficos_agrupados']:
+        for item in grupo['graficos']:
+            if item['miniatura']:
+                sitio.agregar(item['miniatura'], Path(item['miniatura']).read_bytes(), comprimir=False)
+    index_html = indice.render(ctx, asset=lambda ruta: sitio.manifiesto[ruta]['archivo'], plantilla=plantilla)
+    sitio.agregar('index.html', minify_html(index_html).encode('utf-8'), con_hash=False)
+
+    manifiesto = json.dumps({"archivos": sitio.manifiesto}, ensure_ascii=False, indent=2, sort_keys=True)
+    sitio._write(MANIFIESTO, manifiesto.encode('utf-8'))
+    sitio._write(HEADERS, sitio.headers().encode('utf-8'))
+    return sitio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prepara el sitio estático con archivos minificados, con hash y precomprimidos')
+    parser.add_argument('--salida', default=str(SALIDA_DIR), help='Directorio del sitio publicado')
+    parser.add_argument('--graficos', default=GRAFICOS_DIR, help='Directorio con los gráficos generados')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("PUBLICACIÓN DEL SITIO")
+    print("=" * 80)
+
+    sitio = publicar(Path(args.salida), args.graficos)
+    borrados = sitio.limpiar()
+
+    original = sum(e['bytes'] for e in sitio.manifiesto.values())
+    comprimido = sum(e.get('brotli', e['bytes']) for e in sitio.manifiesto.values())
+    print(f"✓ {len(sitio.manifiesto)} archivo(s) publicados en {args.salida}/ "
+          f"({sitio.reutilizados} sin cambios desde la publicación anterior)")
+    print(f"  Tamaño minificado: {original / 1024:.0f} KB | brotli: {comprimido / 1024:.0f} KB")
+    if borrados:
+        print(f"  Se borraron {len(borrados)} archivo(s) de publicaciones anteriores")
+    print(f"✓ Manifiesto: {args.salida}/{MANIFIESTO}")
+
+
+if __name__ == "__main__":
+    main()
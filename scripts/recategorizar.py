@@ -0,0 +1,300 @@
+#!/usr/bin/env -S uv run
+# /// script
+# dependencies = [
+#   "numpy",
+#   "pandas",
+#   "pyarrow",
+# ]
+# ///
+"""
+Script para recategorizar en bloque a contribuyentes a partir de su facturación mensual
+Lee un CSV/Parquet de (cuit, mes, monto) por partes, calcula los ingresos de los últimos
+12 meses en cada recategorización semestral, asigna la categoría vigente según la tabla
+histórica y suma las cuotas mensuales del semestre siguiente
+"""
+
+import os
+import argparse
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from datos import cargar_dataframe
+
+CATEGORIAS = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K']
+EXCLUIDO = 'excluido'
+
+# Recategorización en enero y julio con los ingresos de los 12 meses anteriores;
+# la categoría rige los 6 meses siguientes
+MESES_VENTANA = 12
+MESES_SEMESTRE = 6
+
+# Filas de entrada por partición: cada proceso carga una partición completa, así que este
+# valor (y no el tamaño de la entrada) acota la memoria
+FILAS_POR_PARTICION = 1_000_000
+FILAS_POR_BLOQUE = 500_000
+
+# Separa el código de cuit del mes en las claves de búsqueda (los meses son < 10^6)
+_ESCALA_CLAVE = 1_000_000
+
+
+def mes_index(meses: pd.Series) -> np.ndarray:
+    """Convierte meses 'YYYY-MM' (o fechas 'YYYY-MM-DD') a un índice entero (año × 12 + mes - 1)"""
+    texto = meses.astype(str)
+    years = pd.to_numeric(texto.str.slice(0, 4)).to_numpy()
+    months = pd.to_numeric(texto.str.slice(5, 7)).to_numpy()
+    return (years * 12 + months - 1).astype('int64')
+
+
+def mes_label(indices: np.ndarray) -> pd.Series:
+    """Convierte índices de mes a 'YYYY-MM'"""
+    years = pd.Series(indices // 12).astype(str)
+    months = pd.Series(indices % 12 + 1).astype(str).str.zfill(2)
+    return years + '-' + months
+
+
+def cargar_tabla(df: pd.DataFrame, tipo: str) -> Dict[str, np.ndarray]:
+    """
+    Arma la tabla de categorías por período como arrays
+    Retorna: inicio de cada período (índice de mes), topes de ingresos y cuota mensual
+    (ambos período × categoría)
+    """
+    periodos = df.drop_duplicates('start_date').sort_values('start_date')['start_date']
+    columnas = pd.Index(CATEGORIAS, name='categoria')
+
+    def pivot(rows: pd.DataFrame, value: str) -> pd.DataFrame:
+        table = rows.pivot_table(index='start_date', columns='categoria', values=value, aggfunc='first', observed=True)
+        return table.reindex(index=periodos, columns=columnas).astype('float64')
+
+    # Topes y cuotas de las filas del propio tipo de actividad: una categoría que no existe
+    # para el tipo queda sin tope (los ingresos que no entran en otra son "excluido")
+    servicios = df[df['tipo_actividad'] == 'servicios']
+    topes = pivot(servicios, 'ingresos_brutos')
+    cuotas = pivot(servicios, 'total')
+    if tipo == 'ventas':
+        # Cuando la categoría de ventas coincide con la de servicios el dataset solo tiene servicios
+        ventas = df[df['tipo_actividad'] == 'ventas']
+        topes = pivot(ventas, 'ingresos_brutos').fillna(topes)
+        cuotas = pivot(ventas, 'total').fillna(cuotas)
+
+    return {
+        'inicio': mes_index(periodos.dt.strftime('%Y-%m')),
+        'topes': topes.to_numpy(),
+        'cuotas': cuotas.to_numpy(),
+    }
+
+
+def leer_bloques(entrada: str, filas: int) -> Iterator[pd.DataFrame]:
+    """Lee el archivo de entrada por bloques de `filas` filas (CSV o Parquet)"""
+    if entrada.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(entrada)
+        for batch in parquet.iter_batches(batch_size=filas, columns=['cuit', 'mes', 'monto']):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(entrada, usecols=['cuit', 'mes', 'monto'], dtype={'cuit': str, 'mes': str},
+                               chunksize=filas)
+
+
+def contar_filas(entrada: str) -> int:
+    """Cantidad de filas de datos de la entrada (metadata del Parquet o una pasada por el CSV)"""
+    if entrada.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(entrada).metadata.num_rows
+
+    lineas = 0
+    ultimo = b'\n'
+    with open(entrada, 'rb') as f:
+        for buffer in iter(lambda: f.read(1 << 20), b''):
+            lineas += buffer.count(b'\n')
+            ultimo = buffer[-1:]
+    if ultimo != b'\n':
+        lineas += 1
+    return max(lineas - 1, 0)  # sin el encabezado
+
+
+def cantidad_particiones(filas: int, filas_por_particion: int = FILAS_POR_PARTICION) -> int:
+    """Particiones necesarias para que ninguna supere (en promedio) `filas_por_particion` filas"""
+    return max(1, -(-filas // filas_por_particion))
+
+
+def particionar(entrada: str, directorio: Path, particiones: int, filas: int) -> List[Path]:
+    """
+    Reparte las filas en archivos por hash del cuit, así cada contribuyente queda completo
+    en una sola partición. Cada bloque se agrega por (cuit, mes) antes de escribirse.
+    """
+    paths = [directorio / f'particion_{i:04d}.csv' for i in range(particiones)]
+    for bloque in leer_bloques(entrada, filas):
+        bloque = pd.DataFrame({
+            'cuit': bloque['cuit'].astype(str),
+            'mes': mes_index(bloque['mes']),
+            'monto': pd.to_numeric(bloque['monto']),
+        })
+        bloque = bloque.groupby(['cuit', 'mes'], as_index=False, sort=False)['monto'].sum()
+        particion = pd.util.hash_pandas_object(bloque['cuit'], index=False).to_numpy() % particiones
+        for idx, rows in bloque.groupby(particion, sort=False):
+            path = paths[idx]
+            rows.to_csv(path, mode='a', header=not path.exists(), index=False)
+    return [path for path in paths if path.exists()]
+
+
+def recategorizar_particion(path: Path, tabla: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    Calcula las recategorizaciones de todos los contribuyentes de una partición
+
+    Todo se resuelve con arrays: sumas acumuladas por (cuit, mes) para los ingresos de
+    cada ventana de 12 meses, searchsorted para el período vigente y comparación contra
+    los topes de ese período para la categoría.
+    """
+    rows = pd.read_csv(path, dtype={'cuit': str, 'mes': 'int64', 'monto': 'float64'})
+    serie = rows.groupby(['cuit', 'mes'], sort=True)['monto'].sum()
+    codes, cuits = pd.factorize(serie.index.get_level_values('cuit'), sort=True)
+    meses = serie.index.get_level_values('mes').to_numpy()
+    montos = serie.to_numpy()
+
+    claves = codes.astype('int64') * _ESCALA_CLAVE + meses
+    acumulado = np.concatenate([[0.0], np.cumsum(montos)])
+
+    # Primer y último mes con facturación de cada contribuyente
+    inicio = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    fin = np.r_[inicio[1:], len(codes)] - 1
+    primero = (meses[inicio] // MESES_SEMESTRE + 1) * MESES_SEMESTRE
+    ultimo = (meses[fin] // MESES_SEMESTRE + 1) * MESES_SEMESTRE
+    cantidad = (ultimo - primero) // MESES_SEMESTRE + 1
+
+    # Una fila por contribuyente y punto de recategorización (enero/julio)
+    contribuyente = np.repeat(np.arange(len(cuits)), cantidad)
+    desplazamiento = np.arange(cantidad.sum()) - np.repeat(np.cumsum(cantidad) - cantidad, cantidad)
+    punto = np.repeat(primero, cantidad) + MESES_SEMESTRE * desplazamiento
+
+    # Ingresos de los 12 meses anteriores al punto
+    base = contribuyente * _ESCALA_CLAVE
+    ingresos = (acumulado[np.searchsorted(claves, base + punto)]
+                - acumulado[np.searchsorted(claves, base + punto - MESES_VENTANA)])
+
+    # Categoría: la primera cuyo tope de ingresos cubre los ingresos del período vigente
+    periodo = np.searchsorted(tabla['inicio'], punto, side='right') - 1
+    con_tabla = periodo >= 0
+    entra = ingresos[:, None] <= tabla['topes'][periodo.clip(0)]
+    categoria = np.where(entra.any(axis=1), entra.argmax(axis=1), len(CATEGORIAS))
+
+    # Cuotas de los 6 meses siguientes, con la tabla vigente en cada mes
+    meses_cuota = punto[:, None] + np.arange(1, MESES_SEMESTRE + 1)
+    periodo_cuota = np.searchsorted(tabla['inicio'], meses_cuota, side='right') - 1
+    encuadrado = con_tabla & (categoria < len(CATEGORIAS))
+    cuotas = tabla['cuotas'][periodo_cuota.clip(0), categoria.clip(max=len(CATEGORIAS) - 1)[:, None]]
+    total = np.where(encuadrado, cuotas.sum(axis=1), np.nan)
+
+    etiquetas = np.array(CATEGORIAS + [EXCLUIDO], dtype=object)[categoria]
+    return pd.DataFrame({
+        'cuit': cuits[contribuyente],
+        'recategorizacion': mes_label(punto),
+        'ingresos_12m': ingresos,
+        'categoria': np.where(con_tabla, etiquetas, None),
+        'total_semestre': total,
+    })
+
+
+class Salida:
+    """Escribe los resultados a medida que llegan (CSV o Parquet)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.writer = None
+        self.filas = 0
+        if os.path.exists(path):
+            os.remove(path)
+
+    def write(self, df: pd.DataFrame):
+        if self.path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            self.writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode='a', header=self.filas == 0, index=False)
+        self.filas += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def recategorizar(entrada: str, salida: str, tipo: str = 'servicios', particiones: Optional[int] = None,
+                  filas: int = FILAS_POR_BLOQUE, procesos: Optional[int] = None,
+                  data_json: str = 'data/monotributo_historico.json',
+                  filas_por_particion: int = FILAS_POR_PARTICION) -> int:
+    """
+    Recategoriza todos los contribuyentes del archivo de entrada
+    Retorna: cantidad de filas escritas en la salida
+
+    La memoria queda acotada por el tamaño de bloque (lectura) y el de una partición por
+    proceso. Si no se indica `particiones`, se calcula a partir de la cantidad de filas de
+    la entrada para que cada partición tenga a lo sumo `filas_por_particion` filas.
+    """
+    tabla = cargar_tabla(cargar_dataframe(data_json), tipo)
+    if particiones is None:
+        total = contar_filas(entrada)
+        particiones = cantidad_particiones(total, filas_por_particion)
+        print(f"✓ Entrada de {total} fila(s): {particiones} partición(es) de hasta {filas_por_particion} filas")
+    out = Salida(salida)
+
+    with tempfile.TemporaryDirectory(prefix='recategorizar_') as tmp:
+        paths = particionar(entrada, Path(tmp), particiones, filas)
+        print(f"✓ Entrada repartida en {len(paths)} partición(es)")
+
+        with ProcessPoolExecutor(max_workers=procesos) as executor:
+            # Se mantienen pocas particiones en vuelo para no acumular resultados en memoria
+            max_pendientes = 2 * (procesos or os.cpu_count() or 1)
+            pendientes = deque()
+            try:
+                for path in paths:
+                    pendientes.append(executor.submit(recategorizar_particion, path, tabla))
+                    if len(pendientes) >= max_pendientes:
+                        out.write(pendientes.popleft().result())
+                while pendientes:
+                    out.write(pendientes.popleft().result())
+            finally:
+                out.close()
+
+    return out.filas
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Recategoriza contribuyentes a partir de su facturación mensual (columnas cuit, mes, monto)'
+    )
+    parser.add_argument('entrada', help='CSV o Parquet con columnas cuit, mes (YYYY-MM) y monto')
+    parser.add_argument('salida', help='Archivo de resultados (.csv o .parquet)')
+    parser.add_argument('--tipo', choices=['servicios', 'ventas'], default='servicios', help='Tipo de actividad')
+    parser.add_argument('--particiones', type=int, default=None,
+                        help='Cantidad de particiones por cuit (default: según el tamaño de la entrada)')
+    parser.add_argument('--filas-por-particion', type=int, default=FILAS_POR_PARTICION,
+                        help='Máximo de filas por partición al calcular la cantidad de particiones')
+    parser.add_argument('--filas-por-bloque', type=int, default=FILAS_POR_BLOQUE, help='Filas leídas por bloque')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos en paralelo (default: CPUs)')
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("RECATEGORIZACIÓN EN BLOQUE")
+    print("=" * 80)
+
+    filas = recategorizar(args.entrada, args.salida, tipo=args.tipo, particiones=args.particiones,
+                          filas=args.filas_por_bloque, procesos=args.procesos,
+                          filas_por_particion=args.filas_por_particion)
+
+    print(f"✓ {filas} recategorización(es) guardadas en: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
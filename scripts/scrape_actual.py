@@ -4,6 +4,7 @@
 #   "requests",
 #   "beautifulsoup4",
 #   "urllib3",
+#   "pandas",
 # ]
 # ///
 """
@@ -12,17 +13,42 @@ y agregarla al archivo histórico
 """
 
 import json
+import argparse
 import requests
 from bs4 import BeautifulSoup
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import re
 import urllib3
 
+import columnas
+import validar_datos
+import almacen_sqlite
+import historial
+import archivo_fuentes
+from proyeccion import MESES_ACTUALIZACION
+
 # Deshabilitar advertencias de SSL
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 URL_ACTUAL = "https://www.afip.gob.ar/monotributo/categorias.asp"
+HISTORICO_JSON = "data/monotributo_historico.json"
+
+MESES = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
+    "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+}
+
+# Mención de la vigencia ("vigentes a partir del...", "Vigencia:", "rigen desde...") y la
+# fecha que la sigue: "1 de agosto de 2025", "agosto 2025", "01/08/2025" o "08/2025"
+VIGENCIA_RE = re.compile(r"vigen\w*|a\s+partir\s+del?|rigen?\s+desde", re.IGNORECASE)
+FECHA_VIGENCIA_RE = re.compile(
+    r"(?:(?P<dia>\d{1,2})\s*[º°]?\s+de\s+)?(?P<mes_texto>" + "|".join(MESES) + r")\s+(?:de\s+|del\s+)?(?P<anio_texto>\d{4})"
+    r"|(?:(?P<dia_num>\d{1,2})/)?(?P<mes_num>\d{1,2})/(?P<anio_num>\d{4})",
+    re.IGNORECASE,
+)
+# Cuántos caracteres después de la mención se busca la fecha
+ALCANCE_VIGENCIA = 80
 
 
 def normalize_number(value: str) -> Optional[int]:
@@ -41,6 +67,70 @@ def normalize_number(value: str) -> Optional[int]:
     return int(cleaned)
 
 
+# Orden de las 11 celdas de datos de la página (sin la categoría)
+DEFAULT_COLUMN_MAP = {field: idx for idx, field in enumerate(columnas.CAMPOS)}
+
+
+def map_header(header_row, subheader_row) -> tuple[Dict[str, int], int]:
+    """
+    Mapea el encabezado de la tabla HTML a índices de las celdas de datos
+    Retorna: (mapeo campo → índice, cantidad de celdas de datos)
+
+    Las columnas con colspan (impuesto integrado y total) toman su sub-encabezado
+    (servicios / ventas) de la fila siguiente. La columna de categoría no es parte
+    de las celdas de datos y se descarta.
+    """
+    labels = []
+    spanned = []
+    for cell in header_row.find_all(['td', 'th']):
+        text = cell.get_text(" ", strip=True)
+        colspan = int(cell.get('colspan', 1) or 1)
+        if colspan > 1:
+            spanned.extend(range(len(labels), len(labels) + colspan))
+        labels.extend([text] * colspan)
+
+    sublabels = [""] * len(labels)
+    subcells = [cell.get_text(" ", strip=True) for cell in subheader_row.find_all(['td', 'th'])]
+    for idx, text in zip(spanned, subcells):
+        sublabels[idx] = text
+
+    header_rows = [labels, sublabels]
+    if labels and 'categ' in labels[0].lower():
+        header_rows = [labels[1:], sublabels[1:]]
+
+    width = len(header_rows[0])
+    return columnas.map_columns(header_rows, width), width
+
+
+def parse_vigencia(texto: str) -> Optional[str]:
+    """
+    Fecha de inicio de vigencia que informa la página
+    Retorna: YYYY-MM-DD, o None si el texto no la menciona
+    """
+    texto = " ".join(texto.split())
+    for mencion in VIGENCIA_RE.finditer(texto):
+        fecha = FECHA_VIGENCIA_RE.search(texto, mencion.end(), mencion.end() + ALCANCE_VIGENCIA)
+        if fecha is None:
+            continue
+        if fecha.group('mes_texto'):
+            anio, mes, dia = fecha.group('anio_texto'), MESES[fecha.group('mes_texto').lower()], fecha.group('dia')
+        else:
+            anio, mes, dia = fecha.group('anio_num'), int(fecha.group('mes_num')), fecha.group('dia_num')
+        try:
+            return datetime(int(anio), mes, int(dia or 1)).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def inicio_semestre(fecha: datetime) -> str:
+    """Inicio de las categorías vigentes en una fecha según el calendario de actualizaciones"""
+    anteriores = [m for m in MESES_ACTUALIZACION if m <= fecha.month]
+    if anteriores:
+        return f"{fecha.year}-{max(anteriores):02d}-01"
+    return f"{fecha.year - 1}-{max(MESES_ACTUALIZACION):02d}-01"
+
+
 def extract_current_data() -> tuple[List[Dict[str, Any]], str, str]:
     """
     Extrae los datos de la tabla actual de monotributo
@@ -50,16 +140,28 @@ def extract_current_data() -> tuple[List[Dict[str, Any]], str, str]:
     response = requests.get(URL_ACTUAL, verify=False, timeout=30)
     response.raise_for_status()
 
-    soup = BeautifulSoup(response.content, 'html.parser')
+    # Se archiva la respuesta original para poder volver a parsearla sin descargarla
+    archivo_fuentes.Archivo().guardar(archivo_fuentes.TIPO_ACTUAL, URL_ACTUAL, response.content)
+
+    return parse_current_html(response.content)
+
+
+def parse_current_html(content: bytes, fecha: Optional[datetime] = None) -> tuple[List[Dict[str, Any]], str, str]:
+    """
+    Parsea el HTML de la página actual de monotributo
+    Retorna: (lista de registros, fecha_inicio, fecha_fin)
 
-    # Buscar información de vigencia en el texto
-    # Buscar algo como "Vigente desde..." o fecha en el título
-    vigencia_text = soup.get_text()
+    La fecha de inicio es la vigencia que informa la página. Si no la informa, se toma el
+    inicio del semestre de `fecha` (cuándo se descargó la página; por defecto, ahora).
+    """
+    soup = BeautifulSoup(content, 'html.parser')
 
-    # Buscar fecha de vigencia (puede estar en diferentes formatos)
-    # Por defecto, asumimos que es la fecha actual si no encontramos
-    start_date = "2025-08-01"  # Basado en la información del WebFetch
-    end_date = "2099-12-31"  # Vigente hasta nuevo aviso
+    start_date = parse_vigencia(soup.get_text(" "))
+    if start_date is None:
+        fecha = fecha or datetime.now(timezone.utc)
+        start_date = inicio_semestre(fecha)
+        print(f"⚠ La página no informa la vigencia; se usa el semestre de la descarga ({fecha:%Y-%m-%d}): {start_date}")
+    end_date = validar_datos.FECHA_ABIERTA  # Vigente hasta nuevo aviso
 
     # Buscar la tabla principal
     table = soup.find('table')
@@ -91,6 +193,15 @@ def extract_current_data() -> tuple[List[Dict[str, Any]], str, str]:
 
     print(f"Datos comienzan en fila {data_start_idx}")
 
+    # Mapear las columnas de datos a partir del encabezado y sub-encabezado
+    try:
+        column_map, width = map_header(rows[header_row_idx], rows[header_row_idx + 1])
+    except columnas.LayoutDrift as e:
+        # Sin un encabezado reconocible solo se acepta el orden de 11 celdas conocido
+        print(f"⚠ Formato de encabezado no reconocido ({e}); se usa el orden de columnas conocido")
+        column_map = DEFAULT_COLUMN_MAP
+        width = 11
+
     # Procesar filas de datos
     # Cada fila corresponde a una categoría en orden: A, B, C, D, E, F, G, H, I, J, K
     categorias = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K']
@@ -98,7 +209,7 @@ def extract_current_data() -> tuple[List[Dict[str, Any]], str, str]:
 
     for idx, row in enumerate(rows[data_start_idx:]):
         cells = row.find_all('td')
-        if len(cells) != 11:
+        if len(cells) != width:
             continue
 
         if categoria_idx >= len(categorias):
@@ -107,33 +218,21 @@ def extract_current_data() -> tuple[List[Dict[str, Any]], str, str]:
         categoria = categorias[categoria_idx]
         categoria_idx += 1
 
-        # Extraer el texto de cada celda
+        # Extraer el texto de cada celda según el mapeo de columnas
         cell_values = [cell.get_text(strip=True) for cell in cells]
-
-        # Las 11 celdas son:
-        # [0]: Ingresos brutos
-        # [1]: Superficie
-        # [2]: Energía
-        # [3]: Alquileres
-        # [4]: Precio unitario
-        # [5]: Impuesto integrado (servicios)
-        # [6]: Impuesto integrado (ventas)
-        # [7]: Aportes SIPA
-        # [8]: Aportes obra social
-        # [9]: Total (servicios)
-        # [10]: Total (ventas)
-
-        ingresos_brutos = normalize_number(cell_values[0])
-        superficie = cell_values[1]
-        energia = cell_values[2]
-        alquileres = normalize_number(cell_values[3])
-        precio_unitario = normalize_number(cell_values[4])
-        impuesto_servicios = normalize_number(cell_values[5])
-        impuesto_ventas = normalize_number(cell_values[6])
-        aporte_sipa = normalize_number(cell_values[7])
-        aporte_obra_social = normalize_number(cell_values[8])
-        total_servicios = normalize_number(cell_values[9])
-        total_ventas = normalize_number(cell_values[10])
+        values = {field: cell_values[idx] for field, idx in column_map.items()}
+
+        ingresos_brutos = normalize_number(values.get("ingresos_brutos", ""))
+        superficie = values.get("superficie_afectada", "")
+        energia = values.get("energia_electrica", "")
+        alquileres = normalize_number(values.get("alquileres_devengados", ""))
+        precio_unitario = normalize_number(values.get("precio_unitario_maximo", ""))
+        impuesto_servicios = normalize_number(values.get("impuesto_servicios", ""))
+        impuesto_ventas = normalize_number(values.get("impuesto_ventas", ""))
+        aporte_sipa = normalize_number(values.get("aporte_sipa", ""))
+        aporte_obra_social = normalize_number(values.get("aporte_obra_social", ""))
+        total_servicios = normalize_number(values.get("total_servicios", ""))
+        total_ventas = normalize_number(values.get("total_ventas", ""))
 
         # Crear registro para SERVICIOS
         if total_servicios is not None:
@@ -179,9 +278,55 @@ def update_historical_data(new_records: List[Dict[str, Any]]):
     """Actualiza el archivo histórico con los nuevos datos"""
 
     # Leer archivo histórico
-    with open('data/monotributo_historico.json', 'r', encoding='utf-8') as f:
+    with open(HISTORICO_JSON, 'r', encoding='utf-8') as f:
         historical_data = json.load(f)
 
+    merge_records(historical_data, new_records)
+
+    # No escribir si el período nuevo rompe algún invariante del dataset
+    period = (new_records[0]['start_date'], new_records[0]['end_date'])
+    validar_datos.verificar(historical_data['data'], periodos=[period])
+
+    # Registrar el cambio en el historial y guardar; si no hay cambios no se reescribe el archivo
+    version = historial.guardar_dataset(HISTORICO_JSON, historical_data, fuente=URL_ACTUAL)
+    if version is None:
+        print("\n✓ Sin cambios respecto del histórico")
+        return
+
+    print(f"\n✓ Archivo histórico actualizado (versión {version} del historial)")
+    print(f"  Total de registros: {historical_data['metadata']['total_records']}")
+    print(f"  Rango de fechas: {historical_data['metadata']['date_range']['from']} → {historical_data['metadata']['date_range']['to']}")
+
+
+def update_sqlite(new_records: List[Dict[str, Any]], db_path: str):
+    """Actualiza la base SQLite con los nuevos datos (reemplaza solo el período)"""
+    conn = almacen_sqlite.connect(db_path)
+    try:
+        # Validar el dataset como quedaría después de incorporar el período
+        historical_data = almacen_sqlite.export_json(conn)
+        merge_records(historical_data, new_records)
+        period = (new_records[0]['start_date'], new_records[0]['end_date'])
+        validar_datos.verificar(historical_data['data'], periodos=[period])
+
+        almacen_sqlite.upsert_period(conn, new_records)
+    finally:
+        conn.close()
+
+    print(f"\n✓ Base SQLite actualizada: {db_path}")
+    print(f"  Total de registros: {historical_data['metadata']['total_records']}")
+
+
+def merge_records(historical_data: Dict[str, Any], new_records: List[Dict[str, Any]]):
+    """Incorpora los registros de un período al histórico (reemplaza si ya existe)"""
+
+    # Un período vigente nuevo cierra el anterior el día previo a su inicio
+    start_date = new_records[0]['start_date']
+    if new_records[0]['end_date'] == validar_datos.FECHA_ABIERTA:
+        cierre = (datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+        for record in historical_data['data']:
+            if record['end_date'] == validar_datos.FECHA_ABIERTA and record['start_date'] < start_date:
+                record['end_date'] = cierre
+
     # Verificar si ya existen datos para este período
     existing_periods = set()
     for record in historical_data['data']:
@@ -212,16 +357,12 @@ def update_historical_data(new_records: List[Dict[str, Any]]):
     historical_data['metadata']['total_records'] = len(historical_data['data'])
     historical_data['metadata']['date_range']['to'] = max(r['end_date'] for r in historical_data['data'])
 
-    # Guardar archivo actualizado
-    with open('data/monotributo_historico.json', 'w', encoding='utf-8') as f:
-        json.dump(historical_data, f, ensure_ascii=False, indent=2)
-
-    print(f"\n✓ Archivo histórico actualizado")
-    print(f"  Total de registros: {historical_data['metadata']['total_records']}")
-    print(f"  Rango de fechas: {historical_data['metadata']['date_range']['from']} → {historical_data['metadata']['date_range']['to']}")
-
 
 def main():
+    parser = argparse.ArgumentParser(description='Extrae la tabla vigente del monotributo y la agrega al histórico')
+    parser.add_argument('--sqlite', default=None, metavar='DB', help='Guardar en la base SQLite indicada en lugar del JSON')
+    args = parser.parse_args()
+
     print("=" * 80)
     print("SCRAPER DE MONOTRIBUTO ACTUAL (HTML)")
     print("=" * 80)
@@ -239,7 +380,10 @@ def main():
         print(f"Registros extraídos: {len(new_records)}")
 
         # Actualizar histórico
-        update_historical_data(new_records)
+        if args.sqlite:
+            update_sqlite(new_records, args.sqlite)
+        else:
+            update_historical_data(new_records)
 
         print("\n" + "=" * 80)
         print("PROCESO COMPLETADO")
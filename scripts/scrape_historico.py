@@ -4,6 +4,7 @@
 #   "requests",
 #   "pdfplumber",
 #   "urllib3",
+#   "pandas",
 # ]
 # ///
 """
@@ -12,14 +13,24 @@ Descarga PDFs desde la web de AFIP y extrae los datos en formato JSON normalizad
 """
 
 import os
+import gc
+import sys
 import json
+import argparse
 import requests
 import pdfplumber
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from pathlib import Path
 import urllib3
 import re
 
+import columnas
+import validar_datos
+import almacen_sqlite
+import archivo_fuentes
+import escritura
+import historial
+
 # Deshabilitar advertencias de SSL
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -50,6 +61,7 @@ PDF_DATA = [
 BASE_URL = "https://www.afip.gob.ar/monotributo/"
 OUTPUT_DIR = Path("pdfs")
 OUTPUT_JSON = "data/monotributo_historico.json"
+CHECKPOINT_JSONL = Path("data/scrape_historico.checkpoint.jsonl")
 
 
 def parse_period(period: str) -> tuple[str, str]:
@@ -76,22 +88,61 @@ def parse_period(period: str) -> tuple[str, str]:
     return start_date, end_date
 
 
+NUMBER_RE = re.compile(r"-?\d+")
+# Llamadas a notas al pie ("$ 39 (*****)") y centavos escritos con punto ("$ 30.934.68")
+NOTA_RE = re.compile(r"\(\*+\)")
+CENTAVOS_CON_PUNTO_RE = re.compile(r"\.\d{2}$")
+CATEGORIAS = {'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K'}
+
+# Columnas que se guardan como texto (con la unidad que deben incluir) y columnas de topes ("Hasta $ ...")
+TEXT_FIELDS = {"superficie_afectada": "m2", "energia_electrica": "kw"}
+THRESHOLD_FIELDS = {"ingresos_brutos", "alquileres_devengados", "precio_unitario_maximo"}
+
+
 def normalize_number(value: str) -> Optional[int]:
     """Normaliza un string de precio a int"""
-    if not value or value.strip() in ["", "-", "None", "null"]:
+    if not value:
         return None
 
-    cleaned = value.replace("$", "").replace(" ", "").replace(".", "")
+    # "$ 1.234,56" → "1234" (se descartan los decimales)
+    cleaned = NOTA_RE.sub("", value).replace("$", "").replace(" ", "")
+    if "," not in cleaned:
+        cleaned = CENTAVOS_CON_PUNTO_RE.sub("", cleaned)
+    cleaned = cleaned.replace(".", "").partition(",")[0]
 
-    if "," in cleaned:
-        cleaned = cleaned.split(",")[0]
-
-    if not cleaned or not cleaned.lstrip("-").isdigit():
+    if not NUMBER_RE.fullmatch(cleaned):
         return None
 
     return int(cleaned)
 
 
+def normalize_table(table: List[List[str]]) -> tuple[List[List[str]], List[List[Optional[int]]]]:
+    """
+    Normaliza las filas de datos de una tabla en una sola pasada
+
+    Retorna: (textos, matriz numérica), solo para las filas que empiezan con una categoría.
+    Los montos se repiten mucho entre filas y columnas: cada texto distinto se convierte
+    una única vez.
+    """
+    texts = [
+        [str(cell).strip() if cell else "" for cell in row]
+        for row in table
+        if row and row[0] and str(row[0]).strip() in CATEGORIAS
+    ]
+
+    numeric: Dict[str, Optional[int]] = {}
+    numbers = []
+    for row in texts:
+        row_numbers = []
+        for cell in row:
+            if cell not in numeric:
+                numeric[cell] = normalize_number(cell)
+            row_numbers.append(numeric[cell])
+        numbers.append(row_numbers)
+
+    return texts, numbers
+
+
 def download_pdf(url: str, output_path: Path) -> bool:
     """Descarga un PDF desde la URL especificada"""
     try:
@@ -99,8 +150,8 @@ def download_pdf(url: str, output_path: Path) -> bool:
         response = requests.get(url, timeout=30, verify=False)
         response.raise_for_status()
 
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
+        # Se escribe aparte y se renombra: si el proceso se corta no queda un PDF a medias
+        escritura.write_bytes_atomic(output_path, response.content)
         print(f"  ✓ Guardado en: {output_path}")
         return True
     except Exception as e:
@@ -108,97 +159,90 @@ def download_pdf(url: str, output_path: Path) -> bool:
         return False
 
 
-def parse_table(table: List[List[str]], period: str) -> List[Dict[str, Any]]:
-    """
-    Parsea una tabla del PDF y retorna lista de registros normalizados
+def normalize_threshold(value: str) -> Optional[int]:
+    """Normaliza un tope ("Hasta $ 84.000" → 84000)"""
+    if value[:5].lower() == "hasta":
+        value = value[5:]
+    return normalize_number(value)
+
+
+def detect_layout(table: List[List[str]]) -> Optional[Dict[str, int]]:
     """
-    if not table or len(table) < 3:
-        return []
+    Detecta el mapeo de columnas a partir de las filas de encabezado de la tabla
 
-    records = []
-    start_date, end_date = parse_period(period)
+    Retorna None si la tabla no tiene encabezado (ej: continuación de la tabla anterior)
+    o no tiene filas de categorías.
+    """
+    if not table:
+        return None
 
-    # Buscar la primera fila de datos (la que empieza con una categoría)
-    # Las categorías son letras simples: A, B, C, D, E, F, G, H, I, J, K
     data_start = None
     for i, row in enumerate(table):
-        if row and row[0] and str(row[0]).strip() in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K']:
+        if row and row[0] and str(row[0]).strip() in CATEGORIAS:
             data_start = i
             break
 
-    if data_start is None:
+    if not data_start:
+        return None
+
+    header_rows = [[str(cell).strip() if cell else "" for cell in row] for row in table[:data_start] if row]
+    return columnas.map_columns(header_rows, max(len(row) for row in table))
+
+
+def parse_table(table: List[List[str]], period: str,
+                layout: Optional[Dict[str, int]]) -> List[Dict[str, Any]]:
+    """
+    Parsea una tabla del PDF y retorna lista de registros normalizados
+
+    `layout` es el mapeo de columnas ya resuelto por el llamador: el de detect_layout()
+    sobre la tabla o, si no tiene encabezado propio (continúa en la página siguiente),
+    el de la tabla anterior. Lanza LayoutDrift si no se sabe qué hay en cada columna.
+    """
+    if not table or len(table) < 3:
         return []
 
-    # Procesar cada fila de datos
-    for row in table[data_start:]:
-        if not row or not row[0] or not str(row[0]).strip():
-            continue
+    # Normalizar una sola vez las filas de datos (las que empiezan con una categoría)
+    # Las categorías son letras simples: A, B, C, D, E, F, G, H, I, J, K
+    texts, numbers = normalize_table(table)
+    if not texts:
+        return []
 
-        categoria = str(row[0]).strip()
-        if categoria not in ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K']:
-            continue
+    if layout is None:
+        raise columnas.LayoutDrift("Tabla sin encabezado y sin formato previo")
 
-        # Buscar columnas de forma más flexible
-        # Convertir toda la fila a lista de valores normalizados
-        row_values = [str(cell).strip() if cell else "" for cell in row]
-
-        # Intentar detectar las columnas importantes
-        # Ingresos brutos: segunda columna normalmente
-        ingresos_brutos = normalize_number(row_values[1] if len(row_values) > 1 else "")
-
-        # Buscar columnas con "m2" para superficie
-        superficie = None
-        energia = None
-        for val in row_values[2:8]:
-            if 'm2' in val or 'M2' in val:
-                superficie = val
-            elif 'Kw' in val or 'KW' in val or 'kw' in val:
-                energia = val
-
-        # Buscar alquileres y precio unitario (generalmente después de superficie/energía)
-        alquileres = None
-        precio_unitario = None
-        for idx in range(4, min(len(row_values), 8)):
-            val = normalize_number(row_values[idx])
-            if val and alquileres is None:
-                alquileres = val
-            elif val and precio_unitario is None:
-                precio_unitario = val
-                break
-
-        # Buscar las dos últimas columnas numéricas (suelen ser los totales)
-        # Iterar desde el final
-        numeric_cols = []
-        for idx in range(len(row_values) - 1, -1, -1):
-            val = normalize_number(row_values[idx])
-            if val is not None:
-                numeric_cols.append((idx, val))
-            if len(numeric_cols) >= 6:  # Tomar las últimas 6 columnas numéricas
-                break
-
-        numeric_cols.reverse()
-
-        # Asignar valores (las últimas columnas suelen ser: impuesto_serv, impuesto_venta, sipa, obra_social, total_serv, total_venta)
-        impuesto_servicios = None
-        impuesto_ventas = None
-        aporte_sipa = None
-        aporte_obra_social = None
-        total_servicios = None
-        total_ventas = None
-
-        if len(numeric_cols) >= 6:
-            impuesto_servicios = numeric_cols[0][1]
-            impuesto_ventas = numeric_cols[1][1]
-            aporte_sipa = numeric_cols[2][1]
-            aporte_obra_social = numeric_cols[3][1]
-            total_servicios = numeric_cols[4][1]
-            total_ventas = numeric_cols[5][1]
-        elif len(numeric_cols) >= 4:
-            # Formato simplificado (sin split servicios/ventas)
-            aporte_sipa = numeric_cols[0][1]
-            aporte_obra_social = numeric_cols[1][1]
-            total_servicios = numeric_cols[2][1]
-            total_ventas = numeric_cols[3][1]
+    width = max(len(row) for row in texts)
+    if max(layout.values()) >= width:
+        raise columnas.LayoutDrift(f"La tabla tiene {width} columnas, el formato espera más")
+
+    records = []
+    start_date, end_date = parse_period(period)
+    columns = sorted(layout.items(), key=lambda item: item[1])
+
+    # Procesar cada fila de datos con lecturas directas por índice
+    for row_values, row_numbers in zip(texts, numbers):
+        categoria = row_values[0]
+
+        values: Dict[str, Any] = {}
+        for field, idx in columns:
+            if field in TEXT_FIELDS:
+                value = row_values[idx]
+                values[field] = value if TEXT_FIELDS[field] in value.lower() else None
+            elif field in THRESHOLD_FIELDS and row_numbers[idx] is None:
+                values[field] = normalize_threshold(row_values[idx])
+            else:
+                values[field] = row_numbers[idx]
+
+        ingresos_brutos = values.get("ingresos_brutos")
+        superficie = values.get("superficie_afectada")
+        energia = values.get("energia_electrica")
+        alquileres = values.get("alquileres_devengados")
+        precio_unitario = values.get("precio_unitario_maximo")
+        impuesto_servicios = values.get("impuesto_servicios")
+        impuesto_ventas = values.get("impuesto_ventas")
+        aporte_sipa = values.get("aporte_sipa")
+        aporte_obra_social = values.get("aporte_obra_social")
+        total_servicios = values.get("total_servicios")
+        total_ventas = values.get("total_ventas")
 
         # Crear dos registros: uno para servicios, otro para ventas
         # Solo si tienen valores diferentes
@@ -242,8 +286,171 @@ def parse_table(table: List[List[str]], period: str) -> List[Dict[str, Any]]:
     return records
 
 
+class MemoryLimitExceeded(MemoryError):
+    """Se superó el máximo de memoria configurado durante la extracción"""
+
+
+def current_memory_mb() -> Optional[float]:
+    """Memoria residente actual del proceso en MB (None si no se puede medir)"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # Fallback: pico de memoria (KB en Linux, bytes en macOS)
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+def check_memory(max_memory_mb: Optional[float]):
+    """Verifica que el proceso no supere el máximo de memoria configurado"""
+    if max_memory_mb is None:
+        return
+
+    usage = current_memory_mb()
+    if usage is not None and usage > max_memory_mb:
+        # Antes de abortar, liberar lo que pueda quedar de páginas anteriores
+        gc.collect()
+        usage = current_memory_mb()
+        if usage is not None and usage > max_memory_mb:
+            raise MemoryLimitExceeded(f"Uso de memoria {usage:.0f} MB supera el máximo de {max_memory_mb:.0f} MB")
+
+
+def iter_pdf_records(pdf_path: Path, period: str, max_memory_mb: Optional[float] = None,
+                     verbose: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Extrae los registros de un PDF página por página
+
+    Cada página se cierra apenas se extraen sus tablas para liberar los objetos de layout
+    que pdfplumber cachea, así la memoria no crece con la cantidad total de páginas.
+    """
+    layout = None
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num, page in enumerate(pdf.pages, 1):
+            try:
+                tables = page.extract_tables()
+            finally:
+                page.close()
+
+            for table_num, table in enumerate(tables, 1):
+                # Las tablas sin encabezado continúan el formato de la anterior
+                layout = detect_layout(table) or layout
+                table_records = parse_table(table, period, layout)
+                if table_records and verbose:
+                    print(f"  Página {page_num}, Tabla {table_num}: {len(table_records)} registro(s)")
+                yield from table_records
+
+            del tables
+            check_memory(max_memory_mb)
+
+
+def extract_pdf_records(pdf_path: Path, period: str, max_memory_mb: Optional[float] = None,
+                        verbose: bool = False) -> List[Dict[str, Any]]:
+    """Extrae y parsea todas las tablas de un PDF"""
+    return list(iter_pdf_records(pdf_path, period, max_memory_mb=max_memory_mb, verbose=verbose))
+
+
+class Checkpoint:
+    """
+    Registro de la extracción en curso (JSON Lines, una línea por PDF procesado)
+
+    Cada período se agrega apenas se extrae, con el hash del PDF y sus registros (o el
+    error si falló), y se fuerza a disco. Si la ejecución se corta, `--resume` reutiliza
+    los períodos ya extraídos y solo procesa los que faltan o fallaron.
+    """
+
+    def __init__(self, path: Path = CHECKPOINT_JSONL):
+        self.path = Path(path)
+
+    def reanudar(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna: la última entrada exitosa de cada período
+
+        Si la ejecución anterior se cortó a mitad de una línea, la línea incompleta se
+        descarta del archivo para que las siguientes se agreguen bien.
+        """
+        if not self.path.exists():
+            return {}
+        content = self.path.read_bytes()
+        if content and not content.endswith(b"\n"):
+            content = content[:content.rfind(b"\n") + 1]
+            with open(self.path, 'r+b') as f:
+                f.truncate(len(content))
+
+        entries: Dict[str, Dict[str, Any]] = {}
+        for line in content.decode('utf-8').splitlines():
+            entry = json.loads(line)
+            if entry["estado"] == "ok":
+                entries[entry["period"]] = entry
+            else:
+                entries.pop(entry["period"], None)
+        return entries
+
+    def reset(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("", encoding='utf-8')
+
+    def registrar(self, entry: Dict[str, Any]):
+        escritura.append_line(self.path, json.dumps(entry, ensure_ascii=False))
+
+    def eliminar(self):
+        self.path.unlink(missing_ok=True)
+
+
+def build_output(all_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Arma el JSON de salida (metadata + registros)"""
+    categorias_unicas = set(r["categoria"] for r in all_data)
+
+    return {
+        "metadata": {
+            "source": "AFIP - Monotributo",
+            "url": "https://www.afip.gob.ar/monotributo/montos-y-categorias-anteriores.asp",
+            "total_records": len(all_data),
+            "total_periods": len(PDF_DATA),
+            "unique_categories": sorted(list(categorias_unicas)),
+            "date_range": {
+                "from": min(r["start_date"] for r in all_data),
+                "to": max(r["end_date"] for r in all_data),
+            }
+        },
+        "data": all_data
+    }
+
+
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description='Descarga los PDFs históricos de AFIP y extrae sus datos')
+    parser.add_argument(
+        '--max-memoria-mb',
+        type=float,
+        default=None,
+        help='Máximo de memoria residente (MB) durante la extracción; aborta el PDF si se supera'
+    )
+    parser.add_argument(
+        '--sqlite',
+        default=None,
+        metavar='DB',
+        help='Guardar cada período en la base SQLite indicada (a medida que se procesa) en lugar del JSON'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Continuar una ejecución anterior: no vuelve a extraer los períodos que ya están en el checkpoint'
+    )
+    parser.add_argument(
+        '--checkpoint',
+        default=str(CHECKPOINT_JSONL),
+        help='Archivo donde se registra cada período a medida que se extrae'
+    )
+    args = parser.parse_args()
+
     print("=" * 80)
     print("SCRAPER DE MONOTRIBUTO AFIP")
     print("=" * 80)
@@ -251,6 +458,16 @@ def main():
 
     OUTPUT_DIR.mkdir(exist_ok=True)
     all_data = []
+    fallidos = []
+    conn = almacen_sqlite.connect(args.sqlite) if args.sqlite else None
+    archivo = archivo_fuentes.Archivo()
+
+    checkpoint = Checkpoint(Path(args.checkpoint))
+    completados = checkpoint.reanudar() if args.resume else {}
+    if args.resume:
+        print(f"Continuando desde {checkpoint.path}: {len(completados)} período(s) ya extraídos")
+    else:
+        checkpoint.reset()
 
     for pdf_info in PDF_DATA:
         period = pdf_info["period"]
@@ -262,56 +479,90 @@ def main():
         print(f"Procesando período: {period}")
         print(f"{'='*80}")
 
-        if not pdf_path.exists():
+        descargado = not pdf_path.exists()
+        if descargado:
             if not download_pdf(pdf_url, pdf_path):
+                error = f"No se pudo descargar {pdf_url}"
+                fallidos.append({"period": period, "pdf": pdf_filename, "error": error})
+                checkpoint.registrar({"period": period, "pdf": pdf_filename, "estado": "error", "error": error})
                 continue
         else:
             print(f"PDF ya existe: {pdf_path}")
 
+        # El PDF queda en el archivo de fuentes (la copia local solo se registra si es nueva)
+        pdf_hash = archivo.guardar(archivo_fuentes.TIPO_PDF, pdf_url, pdf_path.read_bytes(),
+                                   descargado=descargado, periodo=period)
+
+        # Período ya extraído en una ejecución anterior (con el mismo PDF)
+        previo = completados.get(period)
+        if previo is not None and previo["sha256"] == pdf_hash:
+            print(f"✓ Ya extraído (checkpoint): {len(previo['records'])} registro(s)")
+            all_data.extend(previo["records"])
+            continue
+
         # Extraer y parsear tablas
         try:
             print(f"Extrayendo tablas de: {pdf_path.name}")
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
-                    tables = page.extract_tables()
-                    for table_num, table in enumerate(tables, 1):
-                        records = parse_table(table, period)
-                        if records:
-                            all_data.extend(records)
-                            print(f"  Página {page_num}, Tabla {table_num}: {len(records)} registro(s)")
+            period_records = list(iter_pdf_records(pdf_path, period, max_memory_mb=args.max_memoria_mb, verbose=True))
+            if conn is not None and period_records:
+                validar_datos.verificar(period_records)
+                almacen_sqlite.upsert_period(conn, period_records)
+                print(f"  ✓ Período guardado en: {args.sqlite}")
         except Exception as e:
             print(f"  ✗ Error: {e}")
+            fallidos.append({"period": period, "pdf": pdf_filename, "error": str(e)})
+            checkpoint.registrar({"period": period, "pdf": pdf_filename, "sha256": pdf_hash,
+                                  "estado": "error", "error": str(e)})
             continue
 
+        checkpoint.registrar({"period": period, "pdf": pdf_filename, "sha256": pdf_hash,
+                              "estado": "ok", "records": period_records})
+        all_data.extend(period_records)
+
+    if fallidos:
+        # Sin todos los períodos el archivo quedaría incompleto: no se escribe
+        print(f"\n{'='*80}")
+        print(f"✗ FALLARON {len(fallidos)} PERÍODO(S)")
+        print(f"{'='*80}")
+        for fallido in fallidos:
+            print(f"  {fallido['period']} ({fallido['pdf']}): {fallido['error']}")
+        print(f"\nLos períodos extraídos quedaron en {checkpoint.path}; "
+              f"ejecutar con --resume para reintentar solo los que fallaron")
+        if conn is not None:
+            conn.close()
+        sys.exit(1)
+
     print(f"\n{'='*80}")
     print(f"GUARDANDO DATOS")
     print(f"{'='*80}")
     print(f"Total de registros: {len(all_data)}")
 
-    # Calcular estadísticas
-    categorias_unicas = set(r["categoria"] for r in all_data)
-    periodos_unicos = set(r["start_date"] for r in all_data)
+    output_data = build_output(all_data)
 
-    output_data = {
-        "metadata": {
-            "source": "AFIP - Monotributo",
-            "url": "https://www.afip.gob.ar/monotributo/montos-y-categorias-anteriores.asp",
-            "total_records": len(all_data),
-            "total_periods": len(PDF_DATA),
-            "unique_categories": sorted(list(categorias_unicas)),
-            "date_range": {
-                "from": min(r["start_date"] for r in all_data),
-                "to": max(r["end_date"] for r in all_data),
-            }
-        },
-        "data": all_data
-    }
+    if conn is not None:
+        # Los períodos ya se guardaron a medida que se procesaron
+        almacen_sqlite.save_metadata(conn, output_data["metadata"])
+        conn.close()
+        print(f"✓ Datos guardados en: {args.sqlite}")
+    else:
+        try:
+            validar_datos.verificar(output_data["data"])
+        except validar_datos.DatasetInvalido as e:
+            print(f"✗ No se guardan los datos: {e}")
+            for v in e.violaciones:
+                print(f"  {v['start_date']} → {v['end_date']} {v['categoria'] or ''} {v['tipo_actividad'] or ''}: {v['detalle']}")
+            sys.exit(1)
+
+        version = historial.guardar_dataset(OUTPUT_JSON, output_data, fuente=output_data["metadata"]["url"])
+        if version is None:
+            print(f"✓ Sin cambios en: {OUTPUT_JSON}")
+        else:
+            print(f"✓ Datos guardados en: {OUTPUT_JSON} (versión {version} del historial)")
 
-    with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    # Extracción completa: el checkpoint ya no hace falta
+    checkpoint.eliminar()
 
-    print(f"✓ Datos guardados en: {OUTPUT_JSON}")
-    print(f"  - Categorías únicas: {len(categorias_unicas)}")
+    print(f"  - Categorías únicas: {len(output_data['metadata']['unique_categories'])}")
     print(f"  - Rango de fechas: {output_data['metadata']['date_range']['from']} → {output_data['metadata']['date_range']['to']}")
 
     print(f"\n{'='*80}")
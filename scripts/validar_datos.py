@@ -0,0 +1,251 @@
+#!/usr/bin/env -S uv run
+# /// script
+# dependencies = [
+#   "pandas",
+# ]
+# ///
+"""
+Script para validar el dataset histórico del monotributo
+Verifica de forma vectorizada los invariantes de los registros (totales, sumas, orden de
+categorías y continuidad de los períodos) y reporta las violaciones como JSON
+"""
+
+import sys
+import json
+import argparse
+from datetime import date
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+import pandas as pd
+
+DATA_JSON = "data/monotributo_historico.json"
+
+# Fecha de fin usada para el período vigente ("hasta nuevo aviso")
+FECHA_ABIERTA = "2099-12-31"
+
+# Los PDFs truncan los decimales de cada monto: la suma de los componentes puede
+# quedar hasta 2 pesos por debajo del total publicado
+TOLERANCIA_REDONDEO = 2
+
+# AFIP actualiza las categorías cada 6 meses
+MAX_MESES_VIGENCIA = 6
+
+# Registros que AFIP publicó con una suma de componentes distinta del total (verificado
+# contra los PDFs): quedan como advertencia para no bloquear la regeneración del dataset
+ERRATAS_PUBLICADAS = {
+    ("2018-01-01", "J", "ventas"),     # $ 5.264,9 + $ 905,5 + $ 536,35 ≠ $ 6.711,75
+    ("2021-07-01", "A", "servicios"),  # el total de servicios no suma los componentes (A a H)
+    ("2021-07-01", "B", "servicios"),
+    ("2021-07-01", "C", "servicios"),
+    ("2021-07-01", "D", "servicios"),
+    ("2021-07-01", "E", "servicios"),
+    ("2021-07-01", "F", "servicios"),
+    ("2021-07-01", "G", "servicios"),
+    ("2021-07-01", "H", "servicios"),
+    ("2024-08-01", "C", "ventas"),     # $ 9.800 + $ 11.858 + $ 13.800 ≠ $ 34.658
+}
+
+CLAVE = ["start_date", "end_date", "categoria", "tipo_actividad"]
+COMPONENTES = ["impuesto_integrado", "aporte_sipa", "aporte_obra_social"]
+COLUMNAS = CLAVE + ["regla", "severidad", "detalle"]
+
+
+class DatasetInvalido(ValueError):
+    """El dataset tiene violaciones de severidad 'error'"""
+
+    def __init__(self, violaciones: List[Dict[str, Any]]):
+        self.violaciones = violaciones
+        reglas = sorted(set(v["regla"] for v in violaciones))
+        super().__init__(f"{len(violaciones)} violación(es) en el dataset: {', '.join(reglas)}")
+
+
+def to_frame(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Convierte los registros en un DataFrame con las columnas que usan las reglas"""
+    df = pd.DataFrame.from_records(records, columns=CLAVE + COMPONENTES + ["ingresos_brutos", "total"])
+    for column in COMPONENTES + ["ingresos_brutos", "total"]:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    return df
+
+
+def violations(rows: pd.DataFrame, regla: str, severidad: str, detalle) -> pd.DataFrame:
+    """Arma el DataFrame de violaciones de una regla"""
+    out = rows.reindex(columns=CLAVE).copy()
+    out["regla"] = regla
+    out["severidad"] = severidad
+    out["detalle"] = detalle
+    return out
+
+
+def check_totales_nulos(df: pd.DataFrame) -> pd.DataFrame:
+    """Todo registro debe tener total"""
+    rows = df[df["total"].isna()]
+    return violations(rows, "total_nulo", "error", "El registro no tiene total")
+
+
+def check_componentes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    impuesto + sipa + obra social debe coincidir con el total (salvo redondeo)
+
+    Un total que no cierra indica columnas mal mapeadas o montos mal leídos: es un error,
+    salvo en las erratas que publicó AFIP (ERRATAS_PUBLICADAS).
+    """
+    parts = df[COMPONENTES]
+    complete = parts.notna().all(axis=1) & df["total"].notna()
+
+    missing = df[~parts.notna().all(axis=1) & df["total"].notna()]
+    faltantes = violations(missing, "componente_nulo", "error",
+                           "Falta algún componente (impuesto, SIPA u obra social)")
+
+    suma = parts[complete].sum(axis=1)
+    diff = suma - df.loc[complete, "total"]
+    bad = diff.abs() > TOLERANCIA_REDONDEO
+    rows = df.loc[complete][bad]
+    detalle = ("impuesto + sipa + obra social = " + suma[bad].astype("int64").astype(str)
+               + " ≠ total " + rows["total"].astype("int64").astype(str))
+    claves = pd.MultiIndex.from_frame(rows[["start_date", "categoria", "tipo_actividad"]])
+    errata = pd.Series(claves.isin(list(ERRATAS_PUBLICADAS)), index=rows.index)
+    severidad = errata.map({True: "advertencia", False: "error"})
+    return pd.concat([faltantes, violations(rows, "suma_componentes", severidad, detalle)])
+
+
+def check_monotonia(df: pd.DataFrame) -> pd.DataFrame:
+    """Los ingresos brutos deben crecer de la categoría A a la K en cada período y tipo"""
+    rows = df[df["ingresos_brutos"].notna()].sort_values(CLAVE)
+    previous = rows.groupby(["start_date", "end_date", "tipo_actividad"], sort=False)["ingresos_brutos"].shift()
+    bad = rows["ingresos_brutos"] <= previous
+    detalle = ("Ingresos brutos " + rows.loc[bad, "ingresos_brutos"].astype("int64").astype(str)
+               + " no superan los de la categoría anterior (" + previous[bad].astype("int64").astype(str) + ")")
+    return violations(rows[bad], "ingresos_no_monotonicos", "error", detalle)
+
+
+def check_duplicados(df: pd.DataFrame) -> pd.DataFrame:
+    """No puede haber dos registros con el mismo período, categoría y tipo"""
+    rows = df[df.duplicated(CLAVE)]
+    return violations(rows, "registro_duplicado", "error", "Registro duplicado para el período, categoría y tipo")
+
+
+def check_periodos(df: pd.DataFrame, hoy: date) -> pd.DataFrame:
+    """Los períodos deben ser consecutivos, sin superponerse ni dejar huecos"""
+    periods = df[["start_date", "end_date"]].drop_duplicates().sort_values(["start_date", "end_date"])
+    start = pd.to_datetime(periods["start_date"], format="%Y-%m-%d", errors="coerce")
+    end = pd.to_datetime(periods["end_date"], format="%Y-%m-%d", errors="coerce")
+    previous_end = end.shift()
+    previous_label = periods["start_date"].shift() + " → " + periods["end_date"].shift()
+
+    found = [
+        violations(periods[start.isna() | end.isna()], "fecha_invalida", "error", "Fecha de inicio o fin inválida"),
+        violations(periods[start > end], "periodo_invertido", "error", "La fecha de inicio es posterior a la de fin"),
+    ]
+
+    overlap = start <= previous_end
+    found.append(violations(periods[overlap], "periodo_superpuesto", "error",
+                            "Se superpone con el período " + previous_label[overlap]))
+
+    gap = start > previous_end + pd.Timedelta(days=1)
+    found.append(violations(periods[gap], "hueco_entre_periodos", "advertencia",
+                            "Hay días sin datos desde el período " + previous_label[gap]))
+
+    # El período vigente tiene fin abierto: debe ser único y no quedar desactualizado
+    open_periods = periods[periods["end_date"] == FECHA_ABIERTA]
+    if len(open_periods) > 1:
+        found.append(violations(open_periods, "multiples_periodos_abiertos", "error",
+                                f"Hay {len(open_periods)} períodos con fin {FECHA_ABIERTA}"))
+
+    limit = pd.Timestamp(hoy) - pd.DateOffset(months=MAX_MESES_VIGENCIA)
+    stale = open_periods[pd.to_datetime(open_periods["start_date"], format="%Y-%m-%d", errors="coerce") < limit]
+    found.append(violations(stale, "vigencia_desactualizada", "advertencia",
+                            f"El período vigente empezó hace más de {MAX_MESES_VIGENCIA} meses; "
+                            "revisar la fecha de vigencia de la página actual"))
+
+    return pd.concat(found)
+
+
+def validate(records: List[Dict[str, Any]], hoy: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Verifica todos los invariantes del dataset en una pasada
+    Retorna: lista de violaciones (clave del registro o período, regla, severidad y detalle)
+    """
+    if not records:
+        return []
+
+    df = to_frame(records)
+    found = pd.concat([
+        check_totales_nulos(df),
+        check_componentes(df),
+        check_monotonia(df),
+        check_duplicados(df),
+        check_periodos(df, hoy or date.today()),
+    ], ignore_index=True)
+
+    found = found.reindex(columns=COLUMNAS).astype(object)
+    return found.where(found.notna(), None).to_dict("records")
+
+
+def errors(violaciones: List[Dict[str, Any]],
+           periodos: Optional[Iterable[Tuple[str, str]]] = None) -> List[Dict[str, Any]]:
+    """Filtra las violaciones de severidad 'error' (opcionalmente solo de ciertos períodos)"""
+    selected = None if periodos is None else set(periodos)
+    return [
+        v for v in violaciones
+        if v["severidad"] == "error"
+        and (selected is None or (v["start_date"], v["end_date"]) in selected)
+    ]
+
+
+def verificar(records: List[Dict[str, Any]], periodos: Optional[Iterable[Tuple[str, str]]] = None,
+              hoy: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Valida el dataset antes de escribirlo
+
+    Lanza DatasetInvalido si hay errores en los períodos indicados (todos si es None), así
+    los errores ya presentes en otros períodos no bloquean una actualización. Las
+    advertencias se imprimen y se retornan.
+    """
+    violaciones = validate(records, hoy=hoy)
+    blocking = errors(violaciones, periodos)
+    if blocking:
+        raise DatasetInvalido(blocking)
+
+    warnings = [v for v in violaciones if v["severidad"] != "error"]
+    if warnings:
+        print(f"⚠ Validación: {len(warnings)} advertencia(s) (ver scripts/validar_datos.py)")
+    return violaciones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Valida los invariantes del dataset del monotributo')
+    parser.add_argument('--archivo', default=DATA_JSON, help='Archivo JSON a validar')
+    parser.add_argument('--json', action='store_true', help='Imprimir las violaciones como JSON')
+    args = parser.parse_args()
+
+    with open(args.archivo, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    violaciones = validate(data['data'])
+
+    if args.json:
+        json.dump(violaciones, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print("=" * 80)
+        print("VALIDACIÓN DEL DATASET")
+        print("=" * 80)
+        print(f"Registros: {len(data['data'])}")
+        print(f"Violaciones: {len(violaciones)}")
+
+        por_regla: Dict[Tuple[str, str], int] = {}
+        for v in violaciones:
+            key = (v["severidad"], v["regla"])
+            por_regla[key] = por_regla.get(key, 0) + 1
+        for (severidad, regla), count in sorted(por_regla.items()):
+            print(f"  [{severidad}] {regla}: {count}")
+
+        for v in errors(violaciones):
+            print(f"  ✗ {v['start_date']} → {v['end_date']} {v['categoria'] or ''} {v['tipo_actividad'] or ''}: {v['detalle']}")
+
+    if errors(violaciones):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Actualización completa de actualizar.py contra una red simulada (httpx.MockTransport)
+"""
+
+import sys
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "scripts"))
+
+import actualizar  # noqa: E402
+import escritura  # noqa: E402
+import historial  # noqa: E402
+import scrape_historico  # noqa: E402
+
+DATASET = "data/monotributo_historico.json"
+IPC = "data/ipc.json"
+IPC_SERIE = [{"fecha": "2025-07-31", "valor": 1.9}, {"fecha": "2025-08-31", "valor": 1.9}]
+
+# Período histórico que falta en el dataset y se descarga
+PENDIENTE = next(p for p in scrape_historico.PDF_DATA if p["period"] == "2019-01_2019-12")
+PERIODO = scrape_historico.parse_period(PENDIENTE["period"])
+
+
+def monto(valor) -> str:
+    return "" if valor is None else f"$ {valor:,}".replace(",", ".") + ",00"
+
+
+def pagina_actual(data: dict) -> bytes:
+    """Página de categorías vigentes con el formato de AFIP, armada con el período vigente del dataset"""
+    vigentes = {}
+    for r in data["data"]:
+        if r["end_date"] == "2099-12-31":
+            vigentes.setdefault(r["categoria"], {})[r["tipo_actividad"]] = r
+
+    filas = []
+    for categoria, tipos in sorted(vigentes.items()):
+        s = tipos["servicios"]
+        v = tipos.get("ventas", s)
+        celdas = [monto(s["ingresos_brutos"]), s["superficie_afectada"], s["energia_electrica"],
+                  monto(s["alquileres_devengados"]), monto(s["precio_unitario_maximo"]),
+                  monto(s["impuesto_integrado"]), monto(v["impuesto_integrado"]),
+                  monto(s["aporte_sipa"]), monto(s["aporte_obra_social"]), monto(s["total"]), monto(v["total"])]
+        filas.append(f"<tr><th>{categoria}</th>" + "".join(f"<td>{c}</td>" for c in celdas) + "</tr>")
+
+    encabezado = (
+        "<tr><th rowspan=2>Categ.</th><th rowspan=2>Ingresos brutos</th><th rowspan=2>Sup. Afectada</th>"
+        "<th rowspan=2>Energía Eléctrica Consumida Anualmente</th><th rowspan=2>Alquileres devengados anualmente</th>"
+        "<th rowspan=2>Precio unitario máximo</th><th colspan=2>Impuesto integrado</th><th rowspan=2>Aportes SIPA</th>"
+        "<th rowspan=2>Aportes obra social</th><th colspan=2>Total</th></tr>"
+        "<tr><th>Locaciones y/o prestaciones de servicios</th><th>Venta de cosas muebles</th>"
+        "<th>Locaciones y/o prestaciones de servicios</th><th>Venta de cosas muebles</th></tr>"
+    )
+    inicio = next(r["start_date"] for r in data["data"] if r["end_date"] == "2099-12-31")
+    vigencia = "/".join(reversed(inicio.split("-")))
+    return (f"<html><body><p>Valores vigentes a partir del {vigencia}</p><table>{encabezado}{''.join(filas)}</table>"
+            "</body></html>").encode("utf-8")
+
+
+@pytest.fixture
+def entorno(tmp_path, monkeypatch):
+    """Dataset sin el período pendiente, sin PDFs locales, y registro de las escrituras JSON"""
+    with open(RAIZ / DATASET, "r", encoding="utf-8") as f:
+        original = json.load(f)
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    dataset = dict(original, data=[r for r in original["data"]
+                                   if (r["start_date"], r["end_date"]) != PERIODO])
+    escritura.write_json_atomic(DATASET, dataset)
+
+    escritos = []
+    write_json_atomic = escritura.write_json_atomic
+
+    def registrar_escritura(path, data):
+        escritos.append(str(path))
+        write_json_atomic(path, data)
+
+    monkeypatch.setattr(escritura, "write_json_atomic", registrar_escritura)
+    return original, dataset, escritos
+
+
+def correr(pagina: bytes, pdf_status: int = 200, ipc: bytes = json.dumps(IPC_SERIE).encode("utf-8")) -> dict:
+    """Corre la actualización con la red simulada y los parsers en hilos"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        if url == actualizar.scrape_actual.URL_ACTUAL:
+            return httpx.Response(200, content=pagina)
+        if url == actualizar.IPC_URL:
+            return httpx.Response(200, content=ipc)
+        if url == scrape_historico.BASE_URL + PENDIENTE["url"]:
+            if pdf_status != 200:
+                return httpx.Response(pdf_status)
+            return httpx.Response(200, content=(RAIZ / "pdfs" / Path(PENDIENTE["url"]).name).read_bytes())
+        return httpx.Response(404)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        return asyncio.run(actualizar.update(transport=httpx.MockTransport(handler), executor=executor))
+
+
+def test_actualizacion_agrega_el_periodo_y_escribe_una_vez(entorno):
+    original, dataset, escritos = entorno
+    correr(pagina_actual(original))
+
+    with open(DATASET, "r", encoding="utf-8") as f:
+        resultado = json.load(f)
+
+    pdf = RAIZ / "pdfs" / Path(PENDIENTE["url"]).name
+    extraidos = scrape_historico.extract_pdf_records(pdf, PENDIENTE["period"])
+    assert [r for r in resultado["data"] if (r["start_date"], r["end_date"]) == PERIODO] == extraidos
+    assert [r for r in resultado["data"] if (r["start_date"], r["end_date"]) != PERIODO] == dataset["data"]
+    assert resultado["metadata"]["total_records"] == len(dataset["data"]) + len(extraidos)
+
+    # Una sola escritura del dataset (más la del IPC), registrada en el historial
+    assert escritos.count(DATASET) == 1
+    assert escritos.count(IPC) == 1
+    assert [v["version"] for v in historial.Historial().versiones()] == [0, 1]
+
+
+def test_periodo_fallido_no_escribe_nada(entorno):
+    original, dataset, escritos = entorno
+
+    with pytest.raises(actualizar.ActualizacionIncompleta) as error:
+        correr(pagina_actual(original), pdf_status=500)
+
+    assert [f["period"] for f in error.value.fallidos] == [PENDIENTE["period"]]
+    assert escritos == []
+    with open(DATASET, "r", encoding="utf-8") as f:
+        assert json.load(f) == dataset
+    assert not Path(IPC).exists()
+    assert not historial.HISTORIAL_DIR.exists()
+
+
+def test_ipc_invalido_conserva_la_copia_local(entorno):
+    original, _, escritos = entorno
+    correr(pagina_actual(original), ipc=b"<html>mantenimiento</html>")
+
+    assert escritos.count(DATASET) == 1
+    assert IPC not in escritos
+    assert not Path(IPC).exists()
@@ -0,0 +1,59 @@
+"""
+Ida y vuelta del dataset por la base SQLite de almacen_sqlite.py
+"""
+
+import sys
+import json
+import copy
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "scripts"))
+
+import almacen_sqlite  # noqa: E402
+
+
+def cargar_dataset() -> dict:
+    with open(RAIZ / "data" / "monotributo_historico.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_import_export_devuelve_el_mismo_dataset(tmp_path):
+    data = cargar_dataset()
+    conn = almacen_sqlite.connect(str(tmp_path / "monotributo.db"))
+    almacen_sqlite.import_json(conn, data)
+
+    assert almacen_sqlite.export_json(conn) == data
+
+
+def test_upsert_period_reemplaza_y_actualiza_la_metadata(tmp_path):
+    data = cargar_dataset()
+    conn = almacen_sqlite.connect(str(tmp_path / "monotributo.db"))
+    almacen_sqlite.import_json(conn, data)
+
+    ultimo = data["data"][-1]
+    vigente = [r for r in data["data"]
+               if (r["start_date"], r["end_date"]) == (ultimo["start_date"], ultimo["end_date"])]
+
+    # Reemplazar el período vigente con una categoría menos y montos distintos
+    reemplazo = copy.deepcopy([r for r in vigente if r["categoria"] != "K"])
+    for record in reemplazo:
+        record["total"] += 1
+    almacen_sqlite.upsert_period(conn, reemplazo)
+
+    exportado = almacen_sqlite.export_json(conn)
+    periodo = [r for r in exportado["data"] if r["start_date"] == ultimo["start_date"]]
+    assert periodo == reemplazo
+    assert exportado["metadata"]["total_records"] == len(data["data"]) - len(vigente) + len(reemplazo)
+    assert exportado["metadata"]["date_range"] == data["metadata"]["date_range"]
+
+    # Un período nuevo se agrega al final y extiende el rango de fechas
+    nuevo = copy.deepcopy(reemplazo)
+    for record in nuevo:
+        record["start_date"], record["end_date"] = "2100-01-01", "2100-12-31"
+    almacen_sqlite.upsert_period(conn, nuevo)
+
+    exportado = almacen_sqlite.export_json(conn)
+    assert exportado["data"][-len(nuevo):] == nuevo
+    assert exportado["metadata"]["total_records"] == len(data["data"]) - len(vigente) + 2 * len(reemplazo)
+    assert exportado["metadata"]["date_range"] == {**data["metadata"]["date_range"], "to": "2100-12-31"}
@@ -0,0 +1,77 @@
+"""
+Archivo de fuentes descargadas y replay de la página actual (archivo_fuentes.py, scrape_actual.py)
+"""
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "scripts"))
+
+import archivo_fuentes  # noqa: E402
+import scrape_actual  # noqa: E402
+
+PAGINA = (
+    "<html><body>{vigencia}<table>"
+    "<tr><th>Categ.</th><th>Ingresos brutos</th><th>Sup. Afectada</th><th>Energía Eléctrica</th>"
+    "<th>Alquileres devengados</th><th>Precio unitario máximo</th><th colspan=2>Impuesto integrado</th>"
+    "<th>Aportes SIPA</th><th>Aportes obra social</th><th colspan=2>Total</th></tr>"
+    "<tr><th>Servicios</th><th>Venta de cosas muebles</th><th>Servicios</th><th>Venta de cosas muebles</th></tr>"
+    "<tr><th>A</th><td>$ 8.992.597,87</td><td>Hasta 30 m2</td><td>Hasta 3330 Kw</td><td>$ 2.091.301,83</td>"
+    "<td>$ 536.767,47</td><td>$ 4.182,60</td><td>$ 4.182,60</td><td>$ 15.616,17</td><td>$ 21.048,46</td>"
+    "<td>$ 40.847,23</td><td>$ 40.847,23</td></tr>"
+    "</table></body></html>"
+)
+
+
+def test_vigencia_de_la_pagina():
+    assert scrape_actual.parse_vigencia("Valores vigentes a partir del 1 de agosto de 2025") == "2025-08-01"
+    assert scrape_actual.parse_vigencia("Vigencia: febrero 2026") == "2026-02-01"
+    assert scrape_actual.parse_vigencia("Montos que rigen desde el 01/08/2025") == "2025-08-01"
+    assert scrape_actual.parse_vigencia("Categorías vigentes. Ingresos brutos anuales (2025)") is None
+
+
+def test_sin_vigencia_se_usa_el_semestre_de_la_descarga():
+    pagina = PAGINA.format(vigencia="<h1>Categorías vigentes</h1>").encode("utf-8")
+    _, inicio, _ = scrape_actual.parse_current_html(pagina, datetime(2026, 1, 15, tzinfo=timezone.utc))
+    assert inicio == "2025-08-01"
+    _, inicio, _ = scrape_actual.parse_current_html(pagina, datetime(2026, 3, 2, tzinfo=timezone.utc))
+    assert inicio == "2026-02-01"
+
+
+def test_replay_usa_la_fecha_de_cada_descarga(tmp_path):
+    archivo = archivo_fuentes.Archivo(tmp_path)
+    sin_vigencia = PAGINA.format(vigencia="").encode("utf-8")
+    con_vigencia = PAGINA.format(vigencia="<p>Vigentes a partir del 1 de agosto de 2025</p>").encode("utf-8")
+
+    # Cada descarga queda en el índice, aunque el contenido se repita
+    url = scrape_actual.URL_ACTUAL
+    archivo.guardar(archivo_fuentes.TIPO_ACTUAL, url, sin_vigencia, fecha=datetime(2025, 9, 1, tzinfo=timezone.utc))
+    archivo.guardar(archivo_fuentes.TIPO_ACTUAL, url, sin_vigencia, fecha=datetime(2026, 2, 10, tzinfo=timezone.utc))
+    archivo.guardar(archivo_fuentes.TIPO_ACTUAL, url, con_vigencia, fecha=datetime(2026, 3, 1, tzinfo=timezone.utc))
+    assert len(archivo.entradas()) == 3
+    assert len(list((tmp_path / "objetos").rglob("*.gz"))) == 2
+
+    resultados = archivo_fuentes.replay(tmp_path, procesos=1)
+    assert [r["registros"][0]["start_date"] for r in resultados] == ["2025-08-01", "2026-02-01", "2025-08-01"]
+
+    # Una copia local que no se volvió a descargar solo se registra la primera vez
+    pdf = b"%PDF-1.4"
+    archivo.guardar(archivo_fuentes.TIPO_PDF, "https://afip/a.pdf", pdf, descargado=False, periodo="2019-01_2019-12")
+    archivo.guardar(archivo_fuentes.TIPO_PDF, "https://afip/a.pdf", pdf, descargado=False, periodo="2019-01_2019-12")
+    assert len(archivo.entradas(archivo_fuentes.TIPO_PDF)) == 1
+
+
+def test_periodo_vigente_nuevo_cierra_el_anterior():
+    pagina = PAGINA.format(vigencia="<p>Vigentes a partir del 1 de agosto de 2025</p>").encode("utf-8")
+    anteriores, _, _ = scrape_actual.parse_current_html(pagina)
+    data = {"metadata": {"date_range": {"from": "2025-08-01", "to": "2099-12-31"}}, "data": anteriores}
+
+    pagina = PAGINA.format(vigencia="<p>Vigentes a partir del 1 de febrero de 2026</p>").encode("utf-8")
+    nuevos, _, _ = scrape_actual.parse_current_html(pagina)
+    scrape_actual.merge_records(data, nuevos)
+
+    assert [(r["start_date"], r["end_date"]) for r in data["data"]] == [
+        ("2025-08-01", "2026-01-31"), ("2026-02-01", "2099-12-31"),
+    ]
@@ -0,0 +1,58 @@
+"""
+Ventana de las actualizaciones semestrales de proyeccion.py contra las del propio dataset
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "scripts"))
+
+from datos import cargar_dataframe  # noqa: E402
+import proyeccion  # noqa: E402
+
+# IPC nacional mensual de INDEC (variación %), junio 2024 a agosto 2025
+IPC_MENSUAL = {
+    "2024-06": 4.6, "2024-07": 4.0, "2024-08": 4.2, "2024-09": 3.5, "2024-10": 2.7,
+    "2024-11": 2.4, "2024-12": 2.7, "2025-01": 2.2, "2025-02": 2.4, "2025-03": 3.7,
+    "2025-04": 2.8, "2025-05": 1.5, "2025-06": 1.6, "2025-07": 1.9, "2025-08": 1.9,
+}
+
+
+def ratio_dataset(df: pd.DataFrame, anterior: str, actualizado: str) -> float:
+    """Cociente de los topes de ingresos brutos entre dos períodos (igual para todas las categorías)"""
+    servicios = df[df['tipo_actividad'] == 'servicios'].set_index('categoria')
+    ratios = (servicios[servicios['start_date'] == actualizado]['ingresos_brutos']
+              / servicios[servicios['start_date'] == anterior]['ingresos_brutos'])
+    assert ratios.max() - ratios.min() < 1e-3
+    return float(ratios.mean())
+
+
+def test_actualizaciones_coinciden_con_el_dataset():
+    # Base agosto 2024: el calendario arranca MESES_SEMESTRE + MESES_REZAGO meses antes
+    mes_base = pd.Period("2024-08", freq='M')
+    desde = mes_base - proyeccion.MESES_SEMESTRE - proyeccion.MESES_REZAGO
+    calendario = list(pd.period_range(desde, "2025-08", freq='M'))
+    assert str(calendario[0]) == "2024-01"
+
+    # Los meses anteriores a junio 2024 no entran en ninguna ventana posterior a la base
+    valores = [IPC_MENSUAL.get(str(m), 0.0) for m in calendario]
+    log_factores = np.log1p(np.array([valores]) / 100)
+
+    inicio = calendario.index(mes_base)
+    multiplicadores = proyeccion.multiplicadores(log_factores, calendario, inicio)[0]
+    posicion = {str(m): i - inicio for i, m in enumerate(calendario)}
+
+    df = cargar_dataframe(str(RAIZ / "data" / "monotributo_historico.json"))
+    febrero = ratio_dataset(df, "2024-08-01", "2025-02-01")  # IPC julio–diciembre 2024
+    agosto = ratio_dataset(df, "2025-02-01", "2025-08-01")   # IPC enero–junio 2025
+
+    # El IPC se publica con un decimal: tolerancia de 0,1% sobre el semestre
+    assert abs(multiplicadores[posicion["2025-02"]] - febrero) / febrero < 1e-3
+    assert abs(multiplicadores[posicion["2025-08"]] / multiplicadores[posicion["2025-02"]] - agosto) / agosto < 1e-3
+    # Entre actualizaciones el multiplicador no cambia
+    assert multiplicadores[posicion["2025-01"]] == 1.0
+    assert multiplicadores[posicion["2025-07"]] == multiplicadores[posicion["2025-02"]]
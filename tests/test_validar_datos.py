@@ -0,0 +1,71 @@
+"""
+Validación del dataset antes de escribirlo (validar_datos.py)
+"""
+
+import sys
+import json
+import copy
+import shutil
+from pathlib import Path
+
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ / "scripts"))
+
+import scrape_actual  # noqa: E402
+import validar_datos  # noqa: E402
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    """Copia del dataset en un directorio de trabajo temporal"""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data").mkdir()
+    shutil.copy(RAIZ / scrape_actual.HISTORICO_JSON, scrape_actual.HISTORICO_JSON)
+    with open(scrape_actual.HISTORICO_JSON, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def periodo_vigente(data: dict) -> list:
+    return [r for r in data["data"] if r["end_date"] == validar_datos.FECHA_ABIERTA]
+
+
+def test_total_que_no_cierra_bloquea_la_escritura(dataset):
+    nuevos = copy.deepcopy(periodo_vigente(dataset))
+    nuevos[0]["total"] += 1000
+
+    with pytest.raises(validar_datos.DatasetInvalido) as error:
+        scrape_actual.update_historical_data(nuevos)
+
+    assert [(v["regla"], v["categoria"], v["tipo_actividad"]) for v in error.value.violaciones] == [
+        ("suma_componentes", nuevos[0]["categoria"], nuevos[0]["tipo_actividad"])
+    ]
+    with open(scrape_actual.HISTORICO_JSON, 'r', encoding='utf-8') as f:
+        assert json.load(f) == dataset
+    assert not Path("data/historial").exists()
+
+
+def test_componente_nulo_bloquea_solo_el_periodo_escrito(dataset):
+    records = copy.deepcopy(dataset["data"])
+    vigente = periodo_vigente({"data": records})
+    vigente[0]["aporte_sipa"] = None
+    periodo = (vigente[0]["start_date"], vigente[0]["end_date"])
+
+    with pytest.raises(validar_datos.DatasetInvalido):
+        validar_datos.verificar(records, periodos=[periodo])
+
+    # Un error en el período vigente no bloquea la escritura de otro período
+    anterior = max((r for r in records if r["end_date"] != validar_datos.FECHA_ABIERTA), key=lambda r: r["start_date"])
+    violaciones = validar_datos.verificar(records, periodos=[(anterior["start_date"], anterior["end_date"])])
+    assert any(v["regla"] == "componente_nulo" and v["severidad"] == "error" for v in violaciones)
+
+
+def test_erratas_publicadas_son_advertencias():
+    records = [{
+        "start_date": "2024-08-01", "end_date": "2025-01-31", "categoria": "C", "tipo_actividad": "ventas",
+        "ingresos_brutos": 13250000, "impuesto_integrado": 9800, "aporte_sipa": 11858,
+        "aporte_obra_social": 13800, "total": 34658,
+    }]
+    violaciones = validar_datos.verificar(records, periodos=[("2024-08-01", "2025-01-31")])
+    assert [(v["regla"], v["severidad"]) for v in violaciones] == [("suma_componentes", "advertencia")]